@@ -1,5 +1,6 @@
 import os
 from typing import List, Dict, Any, Optional, Union
+import httpx
 from langchain_core.language_models import BaseLLM
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langchain_core.tools import BaseTool
@@ -22,6 +23,8 @@ except ImportError:
     OPENAI_AVAILABLE = False
 
 from ..application.config.simple_config import ApplicationConfig
+from ..application.config.table_templates import set_database_features
+from ..infrastructure.database.connection_service import detect_database_features
 from ..utils.sql_safety import is_select_only, sanitize_sql_for_execution
 from ..utils.logging_config import get_llm_manager_logger
 
@@ -94,10 +97,23 @@ class HybridLLMManager:
                 
             logger.info("SQLDatabase initialized", extra={"table_count": len(table_names)})
             
+            self._apply_database_features()
+            
         except Exception as e:
             logger.error("Database initialization failed", extra={"error": str(e)})
             raise
     
+    def _apply_database_features(self):
+        """Let the SQL templates teach the bootstrapped objects that really exist (catalog-only check)"""
+        try:
+            available = detect_database_features(self._sql_database._engine)
+        except Exception as e:
+            logger.warning("Database feature check failed, keeping plain templates", extra={"error": str(e)})
+            return
+        
+        set_database_features(**available)
+        logger.info("SQL template features", extra={"features": available})
+    
     def _initialize_llm(self):
         """Initialize LLM based on provider configuration"""
         try:
@@ -111,7 +127,16 @@ class HybridLLMManager:
                     timeout=self.config.llm_timeout,
                     num_predict=1024,  # Reduced for faster response
                     top_k=5,  # Reduced for more focused responses
-                    top_p=0.9
+                    top_p=0.9,
+                    keep_alive=self.config.llm_keep_alive,
+                    # Pooled keep-alive connections instead of a handshake per call
+                    client_kwargs={
+                        "limits": httpx.Limits(
+                            max_connections=self.config.llm_http_max_connections,
+                            max_keepalive_connections=self.config.llm_http_max_keepalive_connections
+                        ),
+                        "http2": self.config.llm_http2
+                    }
                 )
                 
             elif provider == "groq":
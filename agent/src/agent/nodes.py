@@ -26,7 +26,11 @@ from .state import (
 from .llm_manager import HybridLLMManager
 from ..application.config.simple_config import ApplicationConfig
 from ..utils.sql_safety import is_select_only
-from ..application.config.table_templates import build_table_specific_prompt, build_multi_table_prompt
+from ..application.config.table_templates import (
+    build_table_specific_prompt,
+    build_multi_table_prompt,
+    detect_tables,
+)
 from ..utils.logging_config import get_nodes_logger, TXT2SQLLogger
 from ..utils.classification import (
     detect_sql_snippets,
@@ -660,7 +664,7 @@ Use internal step-by-step reasoning but do NOT include it in the output.
 
 === OUTPUT CONSTRAINTS (MANDATORY) ===
 - Respond with a single SQL statement only
-- Do not include explanations, comments, or markdown
+- Do not include explanations, comments, or markdown (only a leading /*+ ... */ planner hint from the table rules is allowed)
 - Do not include words like 'SQL', 'Answer:', or any prose
 - Quote all case-sensitive identifiers with double quotes
 - Do NOT add demographic or implicit filters (e.g., "SEXO", "IDADE") unless explicitly requested by the user
@@ -2082,23 +2086,12 @@ def _get_intelligent_fallback(user_query: str, available_tables: List[str]) -> L
     Returns:
         Intelligent default table selection
     """
-    query_lower = user_query.lower()
-    
-    # Death-related queries
-    if any(keyword in query_lower for keyword in ['morte', 'óbito', 'falecimento', 'mortalidade']):
-        return ['mortes'] if 'mortes' in available_tables else ['internacoes']
-    
-    # UTI queries
-    if any(keyword in query_lower for keyword in ['uti', 'terapia intensiva', 'cuidados intensivos']):
-        return ['uti_detalhes'] if 'uti_detalhes' in available_tables else ['internacoes']
-    
-    # Obstetric queries
-    if any(keyword in query_lower for keyword in ['obstétric', 'gestante', 'pré-natal', 'parto']):
-        return ['obstetricos'] if 'obstetricos' in available_tables else ['internacoes']
-    
-    # CID queries
-    if any(keyword in query_lower for keyword in ['cid', 'código', 'doença', 'diagnóstico']):
-        return ['cid10'] if 'cid10' in available_tables else ['internacoes']
+    # Single keyword scan; tables checked in priority order
+    # (deaths, UTI, obstetric, CID)
+    detected_tables = detect_tables(user_query)
+    for table_name in ('mortes', 'uti_detalhes', 'obstetricos', 'cid10'):
+        if table_name in detected_tables:
+            return [table_name] if table_name in available_tables else ['internacoes']
     
     # Default to internacoes for most healthcare queries
     return ['internacoes'] if 'internacoes' in available_tables else available_tables[:1]
@@ -1,7 +1,7 @@
 import time
 import logging
 import logging.handlers
-from typing import Dict, Any, Optional, Union, List
+from typing import AsyncIterator, Dict, Any, Iterable, Mapping, Optional, Sequence, Union, List
 from dataclasses import dataclass
 from datetime import datetime
 import json
@@ -16,7 +16,9 @@ from .workflow import (
     create_development_sql_agent,
     create_testing_sql_agent,
     execute_sql_workflow,
-    stream_sql_workflow
+    stream_sql_workflow,
+    aexecute_sql_workflow,
+    astream_sql_workflow
 )
 from .llm_manager import HybridLLMManager
 from .state import create_initial_messages_state, state_to_legacy_format
@@ -257,40 +259,13 @@ class LangGraphOrchestrator:
             session_id = f"session_{int(time.time() * 1000) % 100000}"
         
         # Log query start
-        self.logger.info(f"Query started", extra={
-            "query_id": self._total_queries + 1,
-            "session_id": session_id,
-            "user_query": user_query[:100] + "..." if len(user_query) > 100 else user_query,
-            "streaming": streaming,
-            "model": f"{self._current_model.provider}/{self._current_model.model_name}"
-        })
+        self._log_query_start(user_query, session_id, streaming)
         
         try:
             # Track query
             self._total_queries += 1
             
-            # Prepare LangSmith configuration
-            langsmith_config = config or {}
-            if run_name:
-                langsmith_config["run_name"] = run_name
-            if tags:
-                langsmith_config["tags"] = tags
-            if metadata:
-                langsmith_config["metadata"] = metadata
-            
-            # Add default metadata for tracking
-            default_metadata = {
-                "session_id": session_id,
-                "query_number": self._total_queries,
-                "model_provider": self._current_model.provider,
-                "model_name": self._current_model.model_name,
-                "environment": self.environment
-            }
-            
-            if "metadata" in langsmith_config:
-                langsmith_config["metadata"].update(default_metadata)
-            else:
-                langsmith_config["metadata"] = default_metadata
+            langsmith_config = self._langsmith_config(session_id, config, run_name, tags, metadata)
             
             if streaming:
                 # Return streaming results
@@ -321,81 +296,252 @@ class LangGraphOrchestrator:
                     config=langsmith_config
                 )
                 
-                # Calculate execution time
-                execution_time = time.time() - start_time
-                self._total_execution_time += execution_time
-                
-                # Update result with actual execution time
-                result["execution_time"] = execution_time
-                
-                # Track success/failure
-                if result.get("success", False):
-                    self._successful_queries += 1
-                    self.logger.info("Query completed successfully", extra={
-                        "query_id": self._total_queries,
-                        "session_id": session_id,
-                        "execution_time": execution_time,
-                        "sql_query": result.get("sql_query", "")[:100] + "..." if result.get("sql_query") and len(result.get("sql_query", "")) > 100 else result.get("sql_query", ""),
-                        "row_count": len(result.get("results", []))
-                    })
-                else:
-                    self._failed_queries += 1
-                    self.logger.error("Query failed", extra={
-                        "query_id": self._total_queries,
-                        "session_id": session_id,
-                        "execution_time": execution_time,
-                        "error_message": result.get("error_message", "Unknown error")
-                    })
-                
-                # Add to query history
-                self._add_to_history(user_query, result, execution_time)
-                
-                # Enhance result with orchestrator metadata
-                result["metadata"] = result.get("metadata", {})
-                result["metadata"].update({
-                    "orchestrator_v3": True,
-                    "current_model": {
-                        "provider": self._current_model.provider,
-                        "model_name": self._current_model.model_name,
-                        "temperature": self._current_model.temperature
-                    },
-                    "environment": self.environment,
-                    "session_id": session_id,
-                    "query_number": self._total_queries,
-                    "orchestrator_execution_time": execution_time
-                })
-                
-                return result
+                return self._finalize_result(user_query, session_id, result, start_time)
                 
         except Exception as e:
-            # Handle orchestrator-level errors
-            execution_time = time.time() - start_time
-            self._total_execution_time += execution_time
-            self._failed_queries += 1
+            return self._error_result(user_query, e, start_time)
+    
+    async def aprocess_query(
+        self,
+        user_query: str,
+        session_id: str = None,
+        config: dict = None,
+        run_name: str = None,
+        tags: List[str] = None,
+        metadata: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of process_query (non-streaming), running the workflow with ainvoke
+        
+        Args:
+            user_query: User's natural language question
+            session_id: Optional session identifier
+            config: Additional configuration
+            run_name: Custom name for LangSmith trace
+            tags: Tags for filtering in LangSmith
+            metadata: Additional metadata for LangSmith trace
+            
+        Returns:
+            Query result dictionary
+        """
+        start_time = time.time()
+        
+        if session_id is None:
+            session_id = f"session_{int(time.time() * 1000) % 100000}"
+        
+        self._log_query_start(user_query, session_id, False)
+        
+        try:
+            self._total_queries += 1
+            langsmith_config = self._langsmith_config(session_id, config, run_name, tags, metadata)
+            
+            result = await aexecute_sql_workflow(
+                workflow=self._workflow,
+                user_query=user_query,
+                session_id=session_id,
+                config=langsmith_config
+            )
+            
+            return self._finalize_result(user_query, session_id, result, start_time)
+            
+        except Exception as e:
+            return self._error_result(user_query, e, start_time)
+    
+    async def astream_query(
+        self,
+        user_query: str,
+        session_id: str = None,
+        config: dict = None,
+        run_name: str = None,
+        tags: List[str] = None,
+        metadata: Dict[str, Any] = None,
+        projection: Dict[str, Iterable[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream workflow state updates as each node finishes
+        
+        Unlike process_query(streaming=True), which returns the updates only
+        once the whole workflow is done, updates are yielded as they arrive.
+        
+        Args:
+            user_query: User's natural language question
+            session_id: Optional session identifier
+            config: Additional configuration
+            run_name: Custom name for LangSmith trace
+            tags: Tags for filtering in LangSmith
+            metadata: Additional metadata for LangSmith trace
+            projection: Optional {node_name: fields} whitelist; updates of
+                the listed nodes only carry those fields, other nodes are
+                passed through unchanged
             
-            error_result = {
-                "success": False,
-                "question": user_query,
-                "sql_query": None,
-                "results": [],
-                "row_count": 0,
+        Yields:
+            Workflow state updates ({node_name: node_state})
+        """
+        start_time = time.time()
+        
+        if session_id is None:
+            session_id = f"session_{int(time.time() * 1000) % 100000}"
+        
+        self._log_query_start(user_query, session_id, True)
+        self._total_queries += 1
+        langsmith_config = self._langsmith_config(session_id, config, run_name, tags, metadata)
+        if projection:
+            projection = {node: frozenset(fields) for node, fields in projection.items()}
+        failed = False
+        
+        try:
+            async for update in astream_sql_workflow(
+                workflow=self._workflow,
+                user_query=user_query,
+                session_id=session_id,
+                config=langsmith_config
+            ):
+                if update.get("success") is False and "error" in update:
+                    failed = True
+                if projection:
+                    update = {
+                        node: (
+                            {k: v for k, v in state.items() if k in projection[node]}
+                            if node in projection and isinstance(state, dict) else state
+                        )
+                        for node, state in update.items()
+                    }
+                yield update
+        finally:
+            self._total_execution_time += time.time() - start_time
+        
+        # Track success (simplified for streaming: no workflow error update seen)
+        if failed:
+            self._failed_queries += 1
+        else:
+            self._successful_queries += 1
+    
+    def _log_query_start(self, user_query: str, session_id: str, streaming: bool):
+        """Log the start of a query"""
+        self.logger.info(f"Query started", extra={
+            "query_id": self._total_queries + 1,
+            "session_id": session_id,
+            "user_query": user_query[:100] + "..." if len(user_query) > 100 else user_query,
+            "streaming": streaming,
+            "model": f"{self._current_model.provider}/{self._current_model.model_name}"
+        })
+    
+    def _langsmith_config(
+        self,
+        session_id: str,
+        config: dict = None,
+        run_name: str = None,
+        tags: Sequence[str] = None,
+        metadata: Mapping[str, Any] = None
+    ) -> dict:
+        """Build the LangSmith run configuration for a query"""
+        langsmith_config = config or {}
+        if run_name:
+            langsmith_config["run_name"] = run_name
+        if tags:
+            langsmith_config["tags"] = list(tags)
+        
+        # Add default metadata for tracking
+        default_metadata = {
+            "session_id": session_id,
+            "query_number": self._total_queries,
+            "model_provider": self._current_model.provider,
+            "model_name": self._current_model.model_name,
+            "environment": self.environment
+        }
+        
+        # Merged into a new dict so callers can pass shared (read-only) templates
+        langsmith_config["metadata"] = {
+            **langsmith_config.get("metadata", {}),
+            **(metadata or {}),
+            **default_metadata
+        }
+        return langsmith_config
+    
+    def _finalize_result(
+        self,
+        user_query: str,
+        session_id: str,
+        result: Dict[str, Any],
+        start_time: float
+    ) -> Dict[str, Any]:
+        """Record statistics and history for a finished query and annotate its result"""
+        # Calculate execution time
+        execution_time = time.time() - start_time
+        self._total_execution_time += execution_time
+        
+        # Update result with actual execution time
+        result["execution_time"] = execution_time
+        
+        # Track success/failure
+        if result.get("success", False):
+            self._successful_queries += 1
+            self.logger.info("Query completed successfully", extra={
+                "query_id": self._total_queries,
+                "session_id": session_id,
                 "execution_time": execution_time,
-                "error_message": f"Orchestrator error: {str(e)}",
-                "response": f"Erro do sistema: {str(e)}",
-                "timestamp": datetime.now().isoformat(),
-                "metadata": {
-                    "orchestrator_v3": True,
-                    "orchestrator_error": True,
-                    "error_type": "orchestrator_execution_error",
-                    "current_model": {
-                        "provider": self._current_model.provider,
-                        "model_name": self._current_model.model_name
-                    },
-                    "environment": self.environment
-                }
+                "sql_query": result.get("sql_query", "")[:100] + "..." if result.get("sql_query") and len(result.get("sql_query", "")) > 100 else result.get("sql_query", ""),
+                "row_count": len(result.get("results", []))
+            })
+        else:
+            self._failed_queries += 1
+            self.logger.error("Query failed", extra={
+                "query_id": self._total_queries,
+                "session_id": session_id,
+                "execution_time": execution_time,
+                "error_message": result.get("error_message", "Unknown error")
+            })
+        
+        # Add to query history
+        self._add_to_history(user_query, result, execution_time)
+        
+        # Enhance result with orchestrator metadata
+        result["metadata"] = result.get("metadata", {})
+        result["metadata"].update({
+            "orchestrator_v3": True,
+            "current_model": {
+                "provider": self._current_model.provider,
+                "model_name": self._current_model.model_name,
+                "temperature": self._current_model.temperature
+            },
+            "environment": self.environment,
+            "session_id": session_id,
+            "query_number": self._total_queries,
+            "orchestrator_execution_time": execution_time
+        })
+        
+        return result
+    
+    def _error_result(self, user_query: str, e: Exception, start_time: float) -> Dict[str, Any]:
+        """Record and build the result of an orchestrator-level failure"""
+        # Handle orchestrator-level errors
+        execution_time = time.time() - start_time
+        self._total_execution_time += execution_time
+        self._failed_queries += 1
+        
+        error_result = {
+            "success": False,
+            "question": user_query,
+            "sql_query": None,
+            "results": [],
+            "row_count": 0,
+            "execution_time": execution_time,
+            "error_message": f"Orchestrator error: {str(e)}",
+            "response": f"Erro do sistema: {str(e)}",
+            "timestamp": datetime.now().isoformat(),
+            "metadata": {
+                "orchestrator_v3": True,
+                "orchestrator_error": True,
+                "error_type": "orchestrator_execution_error",
+                "current_model": {
+                    "provider": self._current_model.provider,
+                    "model_name": self._current_model.model_name
+                },
+                "environment": self.environment
             }
-            
-            return error_result
+        }
+        
+        return error_result
     
     def _add_to_history(self, query: str, result: dict, execution_time: float):
         """Add query to history for performance tracking"""
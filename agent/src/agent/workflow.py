@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Literal
 from langgraph.graph import StateGraph, START, END
 
@@ -318,6 +319,48 @@ def create_testing_sql_agent():
 # WORKFLOW EXECUTION HELPERS
 # =============================================================================
 
+def _initial_state(user_query: str, session_id: str = None):
+    """Create the initial workflow state (session id derived from the query when missing)"""
+    # Import here to avoid circular dependencies
+    from .state import create_initial_messages_state
+    
+    if session_id is None:
+        session_id = f"session_{hash(user_query) % 10000}"
+    
+    return create_initial_messages_state(
+        user_query=user_query,
+        session_id=session_id
+    )
+
+
+def _workflow_error_result(user_query: str, e: Exception) -> dict:
+    """Legacy-format result for a workflow that raised"""
+    return {
+        "success": False,
+        "question": user_query,
+        "sql_query": None,
+        "results": [],
+        "row_count": 0,
+        "execution_time": 0.0,
+        "error_message": f"Workflow execution failed: {str(e)}",
+        "response": f"Erro interno: {str(e)}",
+        "timestamp": datetime.now().isoformat(),
+        "metadata": {
+            "langgraph_v3": True,
+            "workflow_error": True,
+            "error_type": "workflow_execution_error"
+        }
+    }
+
+
+def _workflow_stream_error(e: Exception) -> dict:
+    """Update yielded in place of the remaining ones when a workflow stream raises"""
+    return {
+        "error": f"Workflow streaming failed: {str(e)}",
+        "success": False
+    }
+
+
 def execute_sql_workflow(
     workflow,
     user_query: str,
@@ -338,46 +381,17 @@ def execute_sql_workflow(
     """
     
     try:
-        # Import here to avoid circular dependencies
-        from .state import create_initial_messages_state, state_to_legacy_format
-        
-        # Create initial state
-        if session_id is None:
-            session_id = f"session_{hash(user_query) % 10000}"
-        
-        initial_state = create_initial_messages_state(
-            user_query=user_query,
-            session_id=session_id
-        )
+        from .state import state_to_legacy_format
         
-        config = config or {}
-
         # Execute workflow
-        final_state = workflow.invoke(initial_state, config=config)
+        final_state = workflow.invoke(_initial_state(user_query, session_id), config=config or {})
         
         # Convert to legacy format for API compatibility
-        result = state_to_legacy_format(final_state)
-        
-        return result
+        return state_to_legacy_format(final_state)
         
     except Exception as e:
         # Handle workflow execution errors
-        return {
-            "success": False,
-            "question": user_query,
-            "sql_query": None,
-            "results": [],
-            "row_count": 0,
-            "execution_time": 0.0,
-            "error_message": f"Workflow execution failed: {str(e)}",
-            "response": f"Erro interno: {str(e)}",
-            "timestamp": "2024-01-01T00:00:00",
-            "metadata": {
-                "langgraph_v3": True,
-                "workflow_error": True,
-                "error_type": "workflow_execution_error"
-            }
-        }
+        return _workflow_error_result(user_query, e)
 
 
 def stream_sql_workflow(
@@ -400,30 +414,70 @@ def stream_sql_workflow(
     """
     
     try:
-        # Import here to avoid circular dependencies
-        from .state import create_initial_messages_state
+        # Stream workflow execution
+        for state_update in workflow.stream(_initial_state(user_query, session_id), config=config or {}):
+            yield state_update
+            
+    except Exception as e:
+        # Yield error state
+        yield _workflow_stream_error(e)
+
+
+async def aexecute_sql_workflow(
+    workflow,
+    user_query: str,
+    session_id: str = None,
+    config: dict = None
+) -> dict:
+    """
+    Async variant of execute_sql_workflow (runs the graph with ainvoke)
+    
+    Args:
+        workflow: Compiled LangGraph workflow
+        user_query: User's natural language question
+        session_id: Session identifier for checkpointing
+        config: Additional configuration
+        
+    Returns:
+        Execution result dictionary
+    """
+    
+    try:
+        from .state import state_to_legacy_format
         
-        # Create initial state
-        if session_id is None:
-            session_id = f"session_{hash(user_query) % 10000}"
+        final_state = await workflow.ainvoke(_initial_state(user_query, session_id), config=config or {})
         
-        initial_state = create_initial_messages_state(
-            user_query=user_query,
-            session_id=session_id
-        )
+        return state_to_legacy_format(final_state)
         
-        config = config or {}
+    except Exception as e:
+        return _workflow_error_result(user_query, e)
 
-        # Stream workflow execution
-        for state_update in workflow.stream(initial_state, config=config):
+
+async def astream_sql_workflow(
+    workflow,
+    user_query: str,
+    session_id: str = None,
+    config: dict = None
+):
+    """
+    Async variant of stream_sql_workflow (runs the graph with astream)
+    
+    Args:
+        workflow: Compiled LangGraph workflow
+        user_query: User's natural language question
+        session_id: Session identifier
+        config: Additional configuration
+        
+    Yields:
+        State updates during workflow execution
+    """
+    
+    try:
+        async for state_update in workflow.astream(_initial_state(user_query, session_id), config=config or {}):
             yield state_update
             
     except Exception as e:
-        # Yield error state
-        yield {
-            "error": f"Workflow streaming failed: {str(e)}",
-            "success": False
-        }
+        yield _workflow_stream_error(e)
 
 
 # Export main factory functions
@@ -434,5 +488,7 @@ __all__ = [
     "create_development_sql_agent",
     "create_testing_sql_agent",
     "execute_sql_workflow",
-    "stream_sql_workflow"
+    "stream_sql_workflow",
+    "aexecute_sql_workflow",
+    "astream_sql_workflow"
 ]
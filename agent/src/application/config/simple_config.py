@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Optional, Tuple
 from enum import Enum
 import os
 
@@ -32,6 +32,12 @@ class ApplicationConfig:
     llm_timeout: int = 120
     llm_max_retries: int = 3
     
+    # Connection pool of the Ollama HTTP client, shared by the worker threads
+    llm_http_max_connections: int = 100
+    llm_http_max_keepalive_connections: int = 50
+    llm_http2: bool = False  # Only negotiated over TLS (remote endpoints); needs the h2 package
+    llm_keep_alive: str = "30m"  # Keeps the Ollama model (and its prompt-prefix KV cache) loaded
+    
     # Conversational LLM configuration (for natural language responses)
     conversational_llm_model: str = "llama3.1:8b"  # llama3.1:8b, mistral
     conversational_llm_temperature: float = 0.8
@@ -74,3 +80,49 @@ class OrchestratorConfig:
     conversational_fallback: bool = True
     enable_query_routing: bool = True
     routing_confidence_threshold: float = 0.7
+
+
+def _env(name: str, default: str) -> str:
+    return os.getenv(name, default)
+
+
+@dataclass(frozen=True)
+class ApiConfig:
+    """API server settings, read from the environment once at instantiation"""
+    host: str = field(default_factory=lambda: _env("HOST", "0.0.0.0"))
+    port: int = field(default_factory=lambda: int(_env("PORT", "8000")))
+    env: str = field(default_factory=lambda: _env("ENV", "prod"))  # dev enables reload
+    workers: int = field(default_factory=lambda: int(_env("WORKERS", str(os.cpu_count() or 2))))
+    uvicorn_loop: str = field(default_factory=lambda: _env("UVICORN_LOOP", "auto"))
+    uvicorn_http: str = field(default_factory=lambda: _env("UVICORN_HTTP", "auto"))
+    limit_concurrency: int = field(default_factory=lambda: int(_env("LIMIT_CONCURRENCY", "1000")))
+    allowed_origins: Tuple[str, ...] = field(default_factory=lambda: tuple(
+        origin.strip() for origin in _env(
+            "ALLOWED_ORIGINS",
+            "http://localhost:3000,http://localhost:5173,http://127.0.0.1:3000,http://0.0.0.0:3000"
+        ).split(",") if origin.strip()
+    ))
+    
+    allowed_hosts: Tuple[str, ...] = field(default_factory=lambda: tuple(
+        host.strip() for host in _env("ALLOWED_HOSTS", "*").split(",") if host.strip()
+    ))
+    
+    # Agent execution
+    agent_workers: int = field(default_factory=lambda: int(_env("AGENT_WORKERS", "8")))
+    eager_init: bool = field(default_factory=lambda: _env("EAGER_INIT", "0") == "1")
+    agent_retry_backoff: float = field(default_factory=lambda: float(_env("AGENT_RETRY_BACKOFF", "30")))
+    warmup: bool = field(default_factory=lambda: _env("WARMUP", "0") == "1")
+    health_refresh_interval: float = field(default_factory=lambda: float(_env("HEALTH_REFRESH_INTERVAL", "5")))
+    stream_batch_size: int = field(default_factory=lambda: int(_env("STREAM_BATCH_SIZE", "200")))
+    
+    # Response cache
+    query_cache_size: int = field(default_factory=lambda: int(_env("QUERY_CACHE_SIZE", "1000")))
+    query_cache_ttl: float = field(default_factory=lambda: float(_env("QUERY_CACHE_TTL", "3600")))
+    semantic_cache_enabled: bool = field(default_factory=lambda: _env("SEMANTIC_CACHE_ENABLED", "false").lower() == "true")
+    semantic_cache_model: str = field(default_factory=lambda: _env("SEMANTIC_CACHE_MODEL", "all-MiniLM-L6-v2"))
+    semantic_cache_threshold: float = field(default_factory=lambda: float(_env("SEMANTIC_CACHE_THRESHOLD", "0.92")))
+    
+    # Job queue (Celery + Redis); disabled when redis_url is unset
+    redis_url: Optional[str] = field(default_factory=lambda: os.getenv("REDIS_URL") or None)
+    query_task_time_limit: int = field(default_factory=lambda: int(_env("QUERY_TASK_TIME_LIMIT", "120")))
+    query_result_ttl: int = field(default_factory=lambda: int(_env("QUERY_RESULT_TTL", "3600")))
@@ -1,4 +1,7 @@
-from typing import List, Dict, Optional
+import functools
+import re
+import sys
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
 
 
 # PostgreSQL-specific templates for all 15 SIH-RS tables
@@ -277,6 +280,11 @@ TABLE_TEMPLATES = {
         POSTGRESQL COLUMN QUOTING:
         - "N_AIH" (hospitalization ID), "CID_MORTE" (death cause code)
 
+        JOIN ORDER HINT (mortes is much smaller than internacoes):
+        - For FROM mortes m JOIN internacoes i (INNER JOIN, deaths only), start the query with
+          /*+ Leading((m i)) IndexScan(i idx_internacoes_naih) */ so the small table drives the join
+        - Do NOT add the hint to rate queries (FROM internacoes i LEFT JOIN mortes m)
+
         CRITICAL DISEASE LOOKUP RULE - ALWAYS JOIN WITH CID10 TABLE:
         - For ANY query about specific diseases, conditions, or diagnosis names, ALWAYS JOIN with the cid10 table
         - NEVER search for disease names directly in diagnosis code fields (DIAG_PRINC, DIAG_SECUN, CID_MORTE)
@@ -334,6 +342,7 @@ TABLE_TEMPLATES = {
 
         -- Q: "Quantos óbitos ocorreram em 2022?"
         -- Note: Use DT_SAIDA (discharge/death date), not DT_INTER (admission date)
+        /*+ Leading((m i)) IndexScan(i idx_internacoes_naih) */
         SELECT COUNT(*) AS mortes_2022
         FROM mortes m
         JOIN internacoes i ON m."N_AIH" = i."N_AIH"
@@ -642,14 +651,14 @@ TABLE_TEMPLATES = {
         -- Pregnant women in public hospitals
         SELECT COUNT(DISTINCT i."N_AIH") 
         FROM internacoes i 
-        JOIN obstetricos o ON i."N_AIH" = o."N_AIH"
         JOIN hospital h ON i."CNES" = h."CNES"
-        WHERE i."SEXO" = 3 AND h."NATUREZA" ILIKE '%public%';
+        WHERE i."SEXO" = 3 AND h."NATUREZA" ILIKE '%public%'
+          AND i."N_AIH" IN (SELECT "N_AIH" FROM obstetricos);
         
         -- Obstetric cases requiring UTI
-        SELECT COUNT(DISTINCT o."N_AIH")
-        FROM obstetricos o
-        JOIN uti_detalhes u ON o."N_AIH" = u."N_AIH";
+        SELECT COUNT(DISTINCT "N_AIH")
+        FROM obstetricos
+        WHERE "N_AIH" IN (SELECT "N_AIH" FROM uti_detalhes);
 """,
 
     "condicoes_especificas": """
@@ -675,10 +684,10 @@ TABLE_TEMPLATES = {
         SELECT COUNT(*) FROM condicoes_especificas WHERE "IND_VDRL" = '1';
         
         -- VDRL positive cases that resulted in death
-        SELECT COUNT(DISTINCT c."N_AIH") 
-        FROM condicoes_especificas c 
-        JOIN mortes m ON c."N_AIH" = m."N_AIH" 
-        WHERE c."IND_VDRL" = '1';
+        SELECT COUNT(DISTINCT "N_AIH") 
+        FROM condicoes_especificas 
+        WHERE "IND_VDRL" = '1'
+          AND "N_AIH" IN (SELECT "N_AIH" FROM mortes);
         
         -- Special conditions with hospital data
         SELECT h."NATUREZA", COUNT(*) as special_cases
@@ -792,15 +801,15 @@ TABLE_TEMPLATES = {
         ORDER BY frequency DESC LIMIT 10;
         
         -- Healthcare professionals who died
-        SELECT COUNT(DISTINCT c."CBOR") 
-        FROM cbor c 
-        JOIN mortes m ON c."N_AIH" = m."N_AIH" 
-        WHERE c."CBOR" IS NOT NULL;
+        SELECT COUNT(DISTINCT "CBOR") 
+        FROM cbor 
+        WHERE "CBOR" IS NOT NULL
+          AND "N_AIH" IN (SELECT "N_AIH" FROM mortes);
         
         -- CBOR cases requiring UTI
-        SELECT COUNT(DISTINCT c."N_AIH")
-        FROM cbor c
-        JOIN uti_detalhes u ON c."N_AIH" = u."N_AIH";
+        SELECT COUNT(DISTINCT "N_AIH")
+        FROM cbor
+        WHERE "N_AIH" IN (SELECT "N_AIH" FROM uti_detalhes);
 """,
 
     "infehosp": """
@@ -854,6 +863,13 @@ TABLE_TEMPLATES = {
 """
 }
 
+# Once the nonempty(text) helper is verified in the database (see
+# set_database_features) the templates teach it instead of the spelled-out
+# "IS NOT NULL AND != ''" pair (the planner inlines it either way)
+_NONEMPTY_RE = re.compile(r"""((?:\w+\.)?"\w+") IS NOT NULL AND \1 != ''""")
+
+_PLAIN_TABLE_TEMPLATES = TABLE_TEMPLATES
+
 
 # Base PostgreSQL template for SQL generation
 BASE_SQL_TEMPLATE = """You are a PostgreSQL expert assistant for Brazilian healthcare (SIH-RS) data analysis.
@@ -878,6 +894,12 @@ USER QUERY: {user_query}
 Generate the PostgreSQL query:"""
 
 
+# Per-table rule blocks, finalized once at import
+_PREFORMATTED: Dict[str, str] = {
+    table: sys.intern(f"\n{template}") for table, template in TABLE_TEMPLATES.items()
+}
+
+
 def build_table_specific_prompt(selected_tables: List[str]) -> str:
     """
     Builds dynamic prompt based on selected tables for PostgreSQL SIH-RS database
@@ -891,13 +913,25 @@ def build_table_specific_prompt(selected_tables: List[str]) -> str:
     if not selected_tables:
         return "No specific table rules available."
     
+    return _build_table_specific_prompt(_table_key(selected_tables))
+
+
+def _table_key(selected_tables: Iterable[str]) -> Tuple[str, ...]:
+    """Sorted, deduplicated cache key, so permutations share one cache entry"""
+    return tuple(sorted(set(selected_tables)))
+
+
+@functools.lru_cache(maxsize=512)
+def _build_table_specific_prompt(selected_tables: Tuple[str, ...]) -> str:
+    """Cached body of build_table_specific_prompt, keyed by the table tuple"""
     rules = []
     rules.append(" POSTGRESQL TABLE-SPECIFIC RULES AND EXAMPLES:")
     rules.append("=" * 60)
     
     for table in selected_tables:
-        if table in TABLE_TEMPLATES:
-            rules.append(f"\n{TABLE_TEMPLATES[table]}")
+        block = _PREFORMATTED.get(table)
+        if block is not None:
+            rules.append(block)
         else:
             # Generic template for unmapped tables
             rules.append(f"""
@@ -913,7 +947,7 @@ def build_table_specific_prompt(selected_tables: List[str]) -> str:
     # Removing the multi-table logic here prevents duplication when build_multi_table_prompt() 
     # calls this function and then adds MULTI_TABLE_RULES separately
     
-    return "\n".join(rules)
+    return sys.intern("\n".join(rules))
 
 
 def get_table_template(table_name: str) -> Optional[str]:
@@ -929,14 +963,19 @@ def get_table_template(table_name: str) -> Optional[str]:
     return TABLE_TEMPLATES.get(table_name)
 
 
-def get_available_templates() -> List[str]:
+# Tables with templates, computed once (tuple keeps template order)
+_AVAILABLE_TEMPLATES: Tuple[str, ...] = tuple(TABLE_TEMPLATES)
+_AVAILABLE_TEMPLATES_SET: FrozenSet[str] = frozenset(_AVAILABLE_TEMPLATES)
+
+
+def get_available_templates() -> Tuple[str, ...]:
     """
-    Returns list of tables with available templates
+    Returns tables with available templates
     
     Returns:
-        List of table names with templates
+        Immutable tuple of table names with templates
     """
-    return list(TABLE_TEMPLATES.keys())
+    return _AVAILABLE_TEMPLATES
 
 
 def validate_template_coverage(tables: List[str]) -> Dict[str, bool]:
@@ -949,11 +988,62 @@ def validate_template_coverage(tables: List[str]) -> Dict[str, bool]:
     Returns:
         Dictionary mapping table -> has_template
     """
-    return {table: table in TABLE_TEMPLATES for table in tables}
+    return {table: table in _AVAILABLE_TEMPLATES_SET for table in tables}
+
+
+# Flagship aggregate examples; once the materialized views are verified in the
+# database (see set_database_features) the templates teach the pre-aggregated form
+_JOIN_FLAGSHIP_EXAMPLES = """-- Deaths with disease descriptions
+SELECT c."CD_DESCRICAO", COUNT(*) as deaths 
+FROM mortes m 
+INNER JOIN cid10 c ON m."CID_MORTE" = c."CID" 
+WHERE m."CID_MORTE" IS NOT NULL
+GROUP BY c."CD_DESCRICAO" 
+ORDER BY deaths DESC;
 
+-- Hospital mortality analysis
+SELECT h."NATUREZA", 
+       COUNT(DISTINCT i."N_AIH") as total_admissions,
+       COUNT(DISTINCT m."N_AIH") as deaths,
+       ROUND(COUNT(DISTINCT m."N_AIH")::numeric / COUNT(DISTINCT i."N_AIH") * 100, 2) as mortality_rate
+FROM internacoes i
+LEFT JOIN mortes m ON i."N_AIH" = m."N_AIH"
+JOIN hospital h ON i."CNES" = h."CNES"
+WHERE h."NATUREZA" IS NOT NULL
+GROUP BY h."NATUREZA";
+"""
+
+_MATVIEW_FLAGSHIP_EXAMPLES = """-- Deaths with disease descriptions (pre-aggregated materialized view)
+SELECT "CD_DESCRICAO", SUM(deaths) as deaths
+FROM mv_deaths_by_cid
+GROUP BY "CD_DESCRICAO"
+ORDER BY deaths DESC;
+
+-- Hospital mortality analysis (pre-aggregated materialized view)
+SELECT "NATUREZA", total_admissions, deaths,
+       ROUND(deaths::numeric / total_admissions * 100, 2) as mortality_rate
+FROM mv_hospital_mortality;
+
+-- Most frequent procedures (pre-aggregated materialized view)
+SELECT "NOME_PROC", SUM(total_internacoes) as frequency
+FROM mv_proc_stats
+GROUP BY "NOME_PROC"
+ORDER BY frequency DESC
+LIMIT 10;
+
+-- Procedures with highest average cost (pre-aggregated materialized view)
+SELECT "NOME_PROC", SUM(valor_total) / SUM(valor_count) as avg_cost
+FROM mv_proc_stats
+GROUP BY "NOME_PROC"
+HAVING SUM(valor_count) > 0
+ORDER BY avg_cost DESC LIMIT 5;
+
+-- Use the materialized views only for these unfiltered totals; any extra
+-- filter (year, age, sex, municipality) must query the base tables
+"""
 
 # Multi-table JOIN rules for PostgreSQL
-MULTI_TABLE_RULES = """
+_MULTI_TABLE_RULES_TEMPLATE = """
 MULTI-TABLE POSTGRESQL JOIN RULES:
 
 CRITICAL JOIN PATTERNS:
@@ -969,29 +1059,13 @@ JOIN BEST PRACTICES:
 - Always use table aliases for clarity (e.g., i.\"SEXO\", h.\"NATUREZA\")
 - Use INNER JOIN for exact matches, LEFT JOIN to include null records
 - Filter before joining when possible for better performance
+- When another table is only used to filter (existence check, no columns selected),
+  prefer WHERE "N_AIH" IN (SELECT "N_AIH" FROM other_table) over JOIN + COUNT(DISTINCT)
 - Always quote column names with double quotes in PostgreSQL
 
 MULTI-TABLE EXAMPLES:
 
--- Deaths with disease descriptions
-SELECT c."CD_DESCRICAO", COUNT(*) as deaths 
-FROM mortes m 
-INNER JOIN cid10 c ON m."CID_MORTE" = c."CID" 
-WHERE m."CID_MORTE" IS NOT NULL
-GROUP BY c."CD_DESCRICAO" 
-ORDER BY deaths DESC;
-
--- Hospital mortality analysis
-SELECT h."NATUREZA", 
-       COUNT(DISTINCT i."N_AIH") as total_admissions,
-       COUNT(DISTINCT m."N_AIH") as deaths,
-       ROUND(COUNT(DISTINCT m."N_AIH")::numeric / COUNT(DISTINCT i."N_AIH") * 100, 2) as mortality_rate
-FROM internacoes i
-LEFT JOIN mortes m ON i."N_AIH" = m."N_AIH"
-JOIN hospital h ON i."CNES" = h."CNES"
-WHERE h."NATUREZA" IS NOT NULL
-GROUP BY h."NATUREZA";
-
+{flagship_examples}
 -- Municipality health statistics
 SELECT mu."estado", d."nome_municipio", d."populacao",
        COUNT(i."N_AIH") as admissions
@@ -1011,6 +1085,42 @@ GROUP BY c."CID", c."CD_DESCRICAO"
 ORDER BY total DESC
 LIMIT 3;
 """
+MULTI_TABLE_RULES = _MULTI_TABLE_RULES_TEMPLATE.replace("{flagship_examples}", _JOIN_FLAGSHIP_EXAMPLES)
+
+# Constant envelope around the single-table rules in multi-table prompts
+_MULTI_TABLE_HEADER = "\n"
+_MULTI_TABLE_FOOTER = sys.intern(f"\n\n{MULTI_TABLE_RULES}\n")
+
+
+def set_database_features(nonempty: bool = False, matviews: bool = False) -> None:
+    """
+    Switch the templates to the bootstrapped database objects that exist
+    
+    Call with the result of detect_database_features so the prompts never
+    teach objects the database doesn't have; clears the prompt caches.
+    
+    Args:
+        nonempty: The nonempty(text) function exists
+        matviews: The aggregate materialized views exist and are populated
+    """
+    global TABLE_TEMPLATES, _PREFORMATTED, MULTI_TABLE_RULES, _MULTI_TABLE_FOOTER
+    
+    if nonempty:
+        TABLE_TEMPLATES = {
+            table: _NONEMPTY_RE.sub(r"nonempty(\1)", template)
+            for table, template in _PLAIN_TABLE_TEMPLATES.items()
+        }
+    else:
+        TABLE_TEMPLATES = _PLAIN_TABLE_TEMPLATES
+    _PREFORMATTED = {
+        table: sys.intern(f"\n{template}") for table, template in TABLE_TEMPLATES.items()
+    }
+    
+    flagship_examples = _MATVIEW_FLAGSHIP_EXAMPLES if matviews else _JOIN_FLAGSHIP_EXAMPLES
+    MULTI_TABLE_RULES = _MULTI_TABLE_RULES_TEMPLATE.replace("{flagship_examples}", flagship_examples)
+    _MULTI_TABLE_FOOTER = sys.intern(f"\n\n{MULTI_TABLE_RULES}\n")
+    _build_table_specific_prompt.cache_clear()
+    _build_multi_table_prompt.cache_clear()
 
 
 def build_multi_table_prompt(selected_tables: List[str]) -> str:
@@ -1023,17 +1133,52 @@ def build_multi_table_prompt(selected_tables: List[str]) -> str:
     Returns:
         Prompt with multi-table rules
     """
-    if len(selected_tables) <= 1:
-        return build_table_specific_prompt(selected_tables)
+    tables = _table_key(selected_tables)
+    if len(tables) <= 1:
+        return build_table_specific_prompt(tables)
     
+    return _build_multi_table_prompt(tables)
+
+
+@functools.lru_cache(maxsize=512)
+def _build_multi_table_prompt(selected_tables: Tuple[str, ...]) -> str:
+    """Cached body of build_multi_table_prompt, keyed by the table tuple"""
     # If multiple tables, add JOIN rules
-    single_table_rules = build_table_specific_prompt(selected_tables)
+    single_table_rules = _build_table_specific_prompt(selected_tables)
     
-    return f"""
-{single_table_rules}
+    return sys.intern("".join((_MULTI_TABLE_HEADER, single_table_rules, _MULTI_TABLE_FOOTER)))
 
-{MULTI_TABLE_RULES}
-"""
+
+# Portuguese keywords that point at a specific table (used for fallback table selection)
+TABLE_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "mortes": ("morte", "óbito", "falecimento", "mortalidade"),
+    "uti_detalhes": ("uti", "terapia intensiva", "cuidados intensivos"),
+    "obstetricos": ("obstétric", "gestante", "pré-natal", "parto"),
+    "cid10": ("cid", "código", "doença", "diagnóstico"),
+}
+
+_KEYWORD_TABLE: Dict[str, str] = {
+    keyword: table for table, keywords in TABLE_KEYWORDS.items() for keyword in keywords
+}
+
+# Single automaton over every keyword; the lookahead reports overlapping hits
+# so one linear pass over the query finds all tables (same as substring checks)
+_KEYWORD_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in sorted(_KEYWORD_TABLE, key=len, reverse=True)) + "))"
+)
+
+
+def detect_tables(user_query: str) -> Set[str]:
+    """
+    Detects tables referenced by Portuguese keywords in a user query
+    
+    Args:
+        user_query: User's natural language query
+        
+    Returns:
+        Set of table names whose keywords appear in the query
+    """
+    return {_KEYWORD_TABLE[match.group(1)] for match in _KEYWORD_PATTERN.finditer(user_query.lower())}
 
 
 # Template system configuration
@@ -1,9 +1,22 @@
-from typing import List, Dict, Optional
+import functools
+import sys
+import textwrap
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+from typing import Callable, Dict, Iterator, List, Optional
 
 
-# PostgreSQL-specific templates for all 15 SIH-RS tables
-TABLE_TEMPLATES = {
-    "internacoes": """
+# PostgreSQL-specific templates for all 15 SIH-RS tables.
+# Each template has its own builder and is only materialized the first time it
+# is requested; TABLE_TEMPLATES itself is resolved lazily via __getattr__ (PEP 562)
+# as a read-only view over a frozen registry.
+# Builders keep the source-friendly indentation; it is stripped once when the
+# template is first cached so prompts never carry it.
+
+
+def _build_internacoes() -> str:
+    return """
          INTERNACOES TABLE RULES - MAIN HOSPITALIZATION DATA:
         
         MANDATORY VALUE MAPPINGS (NEVER MAKE MISTAKES):
@@ -272,9 +285,11 @@ TABLE_TEMPLATES = {
         GROUP BY i."MUNIC_RES", mu."nome"
         ORDER BY taxa_mortalidade DESC
         LIMIT 10;
-""",
+"""
 
-    "mortes": """
+
+def _build_mortes() -> str:
+    return """
         MORTES TABLE RULES - DEATH RECORDS DURING HOSPITALIZATION:
 
         MANDATORY USAGE RULES:
@@ -367,9 +382,11 @@ TABLE_TEMPLATES = {
         GROUP BY c."CID", c."CD_DESCRICAO"
         ORDER BY total_deaths DESC
         LIMIT 10;
-""",
+"""
 
-    "cid10": """
+
+def _build_cid10() -> str:
+    return """
          CID10 TABLE RULES - ICD-10 DISEASE CODES (REFERENCE TABLE):
         
         MANDATORY USAGE RULES:
@@ -401,9 +418,11 @@ TABLE_TEMPLATES = {
         FROM cid10
         WHERE "CD_DESCRICAO" ILIKE ANY(ARRAY['%cardi%','%cardí%','%miocard%','%vascular%','%arterial%','%circulat%']);
     
-""",
+"""
 
-    "hospital": """
+
+def _build_hospital() -> str:
+    return """
          HOSPITAL TABLE RULES - HEALTHCARE FACILITIES:
 
         MANDATORY USAGE RULES:
@@ -439,9 +458,11 @@ TABLE_TEMPLATES = {
         JOIN internacoes i ON h."CNES" = i."CNES" 
         GROUP BY h."CNES" 
         HAVING COUNT(i."N_AIH") > 1000;
-""",
+"""
 
-    "municipios": """
+
+def _build_municipios() -> str:
+    return """
         MUNICIPIOS TABLE RULES - BRAZILIAN MUNICIPALITIES:
         
         MANDATORY USAGE RULES:
@@ -478,9 +499,11 @@ TABLE_TEMPLATES = {
         FROM municipios 
         GROUP BY "estado" 
         ORDER BY total_cities DESC;
-""",
+"""
+
 
-    "dado_ibge": """
+def _build_dado_ibge() -> str:
+    return """
          DADO_IBGE TABLE RULES - MUNICIPALITY SOCIOECONOMIC DATA:
         
         MANDATORY USAGE RULES:
@@ -520,9 +543,11 @@ TABLE_TEMPLATES = {
         FROM dado_ibge 
         WHERE "ideb_anos_iniciais_ensino_fundamental" IS NOT NULL
         ORDER BY "ideb_anos_iniciais_ensino_fundamental" DESC LIMIT 10;
-""",
+"""
+
 
-    "uti_detalhes": """
+def _build_uti_detalhes() -> str:
+    return """
          UTI_DETALHES TABLE RULES - INTENSIVE CARE UNIT DATA:
         
         MANDATORY USAGE RULES:
@@ -558,9 +583,11 @@ TABLE_TEMPLATES = {
         SELECT COUNT(DISTINCT u."N_AIH") 
         FROM uti_detalhes u 
         JOIN mortes m ON u."N_AIH" = m."N_AIH";
-""",
+"""
+
 
-    "procedimentos": """
+def _build_procedimentos() -> str:
+    return """
          PROCEDIMENTOS TABLE RULES - MEDICAL PROCEDURES REFERENCE:
 
         MANDATORY USAGE RULES:
@@ -629,9 +656,11 @@ TABLE_TEMPLATES = {
         - ✅ SELECT COUNT(*) FROM procedimentos WHERE "NOME_PROC"... (correct)
         - ❌ COUNT(DISTINCT code_col) together with GROUP BY code_col (returns 1 per group)
         - ✅ COUNT(*) with GROUP BY code_col for frequency rankings
-""",
+"""
+
 
-    "obstetricos": """
+def _build_obstetricos() -> str:
+    return """
         OBSTETRICOS TABLE RULES - OBSTETRIC/MATERNITY DATA:
         
         MANDATORY USAGE RULES:
@@ -679,9 +708,11 @@ TABLE_TEMPLATES = {
         SELECT COUNT(DISTINCT o."N_AIH")
         FROM obstetricos o
         JOIN uti_detalhes u ON o."N_AIH" = u."N_AIH";
-""",
+"""
+
 
-    "condicoes_especificas": """
+def _build_condicoes_especificas() -> str:
+    return """
          CONDICOES_ESPECIFICAS TABLE RULES - SPECIAL MEDICAL CONDITIONS:
         
         MANDATORY USAGE RULES:
@@ -715,9 +746,11 @@ TABLE_TEMPLATES = {
         JOIN internacoes i ON c."N_AIH" = i."N_AIH"
         JOIN hospital h ON i."CNES" = h."CNES"
         GROUP BY h."NATUREZA";
-""",
+"""
 
-    "instrucao": """
+
+def _build_instrucao() -> str:
+    return """
         INSTRUCAO TABLE RULES - EDUCATION LEVEL DATA:
         
         MANDATORY USAGE RULES:
@@ -759,9 +792,11 @@ TABLE_TEMPLATES = {
         WHERE ins."INSTRU" IS NOT NULL AND i."VAL_TOT" IS NOT NULL
         GROUP BY ins."INSTRU"
         ORDER BY avg_cost DESC;
-""",
+"""
 
-    "vincprev": """
+
+def _build_vincprev() -> str:
+    return """
         VINCPREV TABLE RULES - SOCIAL SECURITY LINKAGE:
         
         MANDATORY USAGE RULES:
@@ -792,9 +827,11 @@ TABLE_TEMPLATES = {
         FROM vincprev v
         LEFT JOIN mortes m ON v."N_AIH" = m."N_AIH"
         GROUP BY v."VINCPREV";
-""",
+"""
 
-    "cbor": """
+
+def _build_cbor() -> str:
+    return """
         CBOR TABLE RULES - PROFESSIONAL OCCUPATION CLASSIFICATION:
         
         MANDATORY USAGE RULES:
@@ -830,9 +867,11 @@ TABLE_TEMPLATES = {
         SELECT COUNT(DISTINCT c."N_AIH")
         FROM cbor c
         JOIN uti_detalhes u ON c."N_AIH" = u."N_AIH";
-""",
+"""
 
-    "infehosp": """
+
+def _build_infehosp() -> str:
+    return """
         INFEHOSP TABLE RULES - HOSPITAL INFECTIONS:
         
         MANDATORY USAGE RULES:
@@ -854,9 +893,11 @@ TABLE_TEMPLATES = {
         
         -- This query will return no results
         SELECT * FROM infehosp LIMIT 10;
-""",
+"""
 
-    "diagnosticos_secundarios": """
+
+def _build_diagnosticos_secundarios() -> str:
+    return """
          DIAGNOSTICOS_SECUNDARIOS TABLE RULES - SECONDARY DIAGNOSES:
         
         MANDATORY USAGE RULES:
@@ -881,8 +922,108 @@ TABLE_TEMPLATES = {
         SELECT COUNT(*) FROM internacoes 
         WHERE "DIAG_SECUN" IS NOT NULL AND "DIAG_SECUN" != '';
 """
+
+
+_BUILDERS: Dict[str, Callable[[], str]] = {
+    "internacoes": _build_internacoes,
+    "mortes": _build_mortes,
+    "cid10": _build_cid10,
+    "hospital": _build_hospital,
+    "municipios": _build_municipios,
+    "dado_ibge": _build_dado_ibge,
+    "uti_detalhes": _build_uti_detalhes,
+    "procedimentos": _build_procedimentos,
+    "obstetricos": _build_obstetricos,
+    "condicoes_especificas": _build_condicoes_especificas,
+    "instrucao": _build_instrucao,
+    "vincprev": _build_vincprev,
+    "cbor": _build_cbor,
+    "infehosp": _build_infehosp,
+    "diagnosticos_secundarios": _build_diagnosticos_secundarios,
 }
 
+_CACHE: Dict[str, str] = {}
+
+
+class _LazyTemplates(Mapping):
+    """Read-only table -> template mapping that builds entries on first access"""
+
+    def __getitem__(self, table_name: str) -> str:
+        template = _CACHE.get(table_name)
+        if template is None:
+            raw = _BUILDERS[table_name]()
+            template = _CACHE[table_name] = sys.intern(textwrap.dedent(raw).strip())
+        return template
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_BUILDERS)
+
+    def __len__(self) -> int:
+        return len(_BUILDERS)
+
+    def __contains__(self, table_name: object) -> bool:
+        return table_name in _BUILDERS
+
+
+_TEMPLATES = _LazyTemplates()
+
+
+@dataclass(frozen=True)
+class _TableTemplates:
+    """Immutable registry with one slot per SIH-RS table template"""
+    __slots__ = (
+        "internacoes",
+        "mortes",
+        "cid10",
+        "hospital",
+        "municipios",
+        "dado_ibge",
+        "uti_detalhes",
+        "procedimentos",
+        "obstetricos",
+        "condicoes_especificas",
+        "instrucao",
+        "vincprev",
+        "cbor",
+        "infehosp",
+        "diagnosticos_secundarios",
+    )
+
+    internacoes: str
+    mortes: str
+    cid10: str
+    hospital: str
+    municipios: str
+    dado_ibge: str
+    uti_detalhes: str
+    procedimentos: str
+    obstetricos: str
+    condicoes_especificas: str
+    instrucao: str
+    vincprev: str
+    cbor: str
+    infehosp: str
+    diagnosticos_secundarios: str
+
+
+@functools.lru_cache(maxsize=1)
+def _registry() -> _TableTemplates:
+    """Materialize every template into the frozen registry (once)"""
+    return _TableTemplates(**{table_name: _TEMPLATES[table_name] for table_name in _BUILDERS})
+
+
+def __getattr__(name: str):
+    """Resolve TABLE_TEMPLATES on demand (PEP 562)"""
+    if name == "TABLE_TEMPLATES":
+        registry = _registry()
+        templates = MappingProxyType(
+            {field.name: getattr(registry, field.name) for field in fields(registry)}
+        )
+        # Bind the read-only view so later lookups skip __getattr__
+        globals()["TABLE_TEMPLATES"] = templates
+        return templates
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Base PostgreSQL template for SQL generation
 BASE_SQL_TEMPLATE = """You are a PostgreSQL expert assistant for Brazilian healthcare (SIH-RS) data analysis.
@@ -907,6 +1048,17 @@ USER QUERY: {user_query}
 Generate the PostgreSQL query:"""
 
 
+# Generic template for unmapped tables (dedented once at import)
+_GENERIC_TABLE_RULES = "\n" + textwrap.dedent("""
+    {table} - GENERAL POSTGRESQL RULES:
+    - Use proper column names with double quotes: "COLUMN_NAME"
+    - Apply appropriate WHERE conditions for filtering
+    - Use LIMIT for large result sets to improve performance
+    - Consider NULL values in WHERE clauses
+    - Use PostgreSQL-specific functions when appropriate
+""").strip()
+
+
 def build_table_specific_prompt(selected_tables: List[str]) -> str:
     """
     Builds dynamic prompt based on selected tables for PostgreSQL SIH-RS database
@@ -925,18 +1077,10 @@ def build_table_specific_prompt(selected_tables: List[str]) -> str:
     rules.append("=" * 60)
     
     for table in selected_tables:
-        if table in TABLE_TEMPLATES:
-            rules.append(f"\n{TABLE_TEMPLATES[table]}")
+        if table in _TEMPLATES:
+            rules.append(f"\n{_TEMPLATES[table]}")
         else:
-            # Generic template for unmapped tables
-            rules.append(f"""
-        {table.upper()} - GENERAL POSTGRESQL RULES:
-        - Use proper column names with double quotes: "COLUMN_NAME"
-        - Apply appropriate WHERE conditions for filtering
-        - Use LIMIT for large result sets to improve performance
-        - Consider NULL values in WHERE clauses
-        - Use PostgreSQL-specific functions when appropriate
-        """)
+            rules.append(_GENERIC_TABLE_RULES.format(table=table.upper()))
     
     # NOTE: Multi-table JOIN rules are handled by build_multi_table_prompt() only
     # Removing the multi-table logic here prevents duplication when build_multi_table_prompt() 
@@ -955,7 +1099,7 @@ def get_table_template(table_name: str) -> Optional[str]:
     Returns:
         Table template or None if doesn't exist
     """
-    return TABLE_TEMPLATES.get(table_name)
+    return _TEMPLATES.get(table_name)
 
 
 def get_available_templates() -> List[str]:
@@ -965,7 +1109,7 @@ def get_available_templates() -> List[str]:
     Returns:
         List of table names with templates
     """
-    return list(TABLE_TEMPLATES.keys())
+    return list(_TEMPLATES.keys())
 
 
 def validate_template_coverage(tables: List[str]) -> Dict[str, bool]:
@@ -978,7 +1122,7 @@ def validate_template_coverage(tables: List[str]) -> Dict[str, bool]:
     Returns:
         Dictionary mapping table -> has_template
     """
-    return {table: table in TABLE_TEMPLATES for table in tables}
+    return {table: table in _TEMPLATES for table in tables}
 
 
 # Multi-table JOIN rules for PostgreSQL
@@ -1086,7 +1230,7 @@ def get_template_stats() -> Dict[str, int]:
         Dictionary with template statistics
     """
     return {
-        "total_templates": len(TABLE_TEMPLATES),
+        "total_templates": len(_TEMPLATES),
         "populated_tables": 13,  # Tables with data
         "empty_tables": 2,       # infehosp, diagnosticos_secundarios
         "reference_tables": 5,   # cid10, hospital, municipios, dado_ibge, procedimentos
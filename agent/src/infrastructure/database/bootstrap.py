@@ -0,0 +1,68 @@
+"""
+One-off database bootstrap and maintenance commands
+
+Run from the agent directory, e.g.:
+
+    python -m src.infrastructure.database.bootstrap --indexes --matviews
+    python -m src.infrastructure.database.bootstrap --refresh-matviews
+
+The connection string comes from --db-url or DATABASE_URL. Exits non-zero
+when any statement fails.
+"""
+import argparse
+import os
+import sys
+from typing import Dict, List, Optional
+
+from .connection_service import PostgreSQLDatabaseConnectionService
+
+
+def _report(results: Dict[str, Optional[str]]) -> bool:
+    """Print one line per object (with the error when it failed) and return True if all succeeded"""
+    for name, error in results.items():
+        if error is None:
+            print(f"ok     {name}")
+        else:
+            print(f"FAILED {name}: {error}")
+    return all(error is None for error in results.values())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="SIH-RS database bootstrap")
+    parser.add_argument("--db-url", default=os.getenv("DATABASE_URL"),
+                        help="PostgreSQL connection string (default: DATABASE_URL)")
+    parser.add_argument("--indexes", action="store_true",
+                        help="Create the JOIN/filter indexes and the nonempty() helper")
+    parser.add_argument("--matviews", action="store_true",
+                        help="Create the aggregate materialized views")
+    parser.add_argument("--refresh-matviews", action="store_true",
+                        help="Refresh the aggregate materialized views (run periodically)")
+    args = parser.parse_args(argv)
+    
+    if not args.db_url:
+        parser.error("Defina DATABASE_URL no .env ou use --db-url.")
+    if not (args.indexes or args.matviews or args.refresh_matviews):
+        parser.error("Nothing to do: pass --indexes, --matviews and/or --refresh-matviews")
+    
+    service = PostgreSQLDatabaseConnectionService(args.db_url)
+    ok = True
+    try:
+        if args.indexes:
+            ok = _report(service.bootstrap_indexes()) and ok
+        if args.matviews:
+            ok = _report(service.bootstrap_materialized_views()) and ok
+        if args.refresh_matviews:
+            ok = _report(service.refresh_materialized_views()) and ok
+    finally:
+        service.close_connection()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    sys.exit(main())
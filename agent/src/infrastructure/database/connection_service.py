@@ -1,6 +1,15 @@
+import threading
 from abc import ABC, abstractmethod
-from typing import Optional
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 from langchain_community.utilities import SQLDatabase
+from sqlalchemy import create_engine
+
+try:
+    from psycopg2 import extensions as _pg_extensions
+    from psycopg2.pool import ThreadedConnectionPool
+except ImportError as e:
+    raise ImportError("psycopg2 não instalado. Execute: pip install psycopg2-binary") from e
 
 
 class IDatabaseConnectionService(ABC):
@@ -17,60 +26,345 @@ class IDatabaseConnectionService(ABC):
         pass
     
     @abstractmethod
-    def test_connection(self) -> bool:
-        """Test if database connection is working"""
+    def test_connection(self, deep: bool = False) -> bool:
+        """Test if database connection is working (deep=True runs a real query)"""
         pass
 
 
+# Indexes on the documented JOIN/filter columns (index name, table, column)
+BOOTSTRAP_INDEXES: Tuple[Tuple[str, str, str], ...] = (
+    ("idx_internacoes_cnes", "internacoes", "CNES"),
+    ("idx_internacoes_naih", "internacoes", "N_AIH"),
+    ("idx_internacoes_diagprinc", "internacoes", "DIAG_PRINC"),
+    ("idx_internacoes_dtinter", "internacoes", "DT_INTER"),
+    ("idx_mortes_naih", "mortes", "N_AIH"),
+    ("idx_obstetricos_naih", "obstetricos", "N_AIH"),
+    ("idx_uti_detalhes_naih", "uti_detalhes", "N_AIH"),
+    ("idx_municipios_ibge", "municipios", "codigo_ibge"),
+    ("idx_municipios_codigo6d", "municipios", "codigo_6d"),
+)
+
+# Composite indexes for per-procedure filters by period/place/sex (index name, table, columns)
+COMPOSITE_INDEXES: Tuple[Tuple[str, str, Tuple[str, ...]], ...] = (
+    ("idx_internacoes_proc_dtinter", "internacoes", ("PROC_REA", "DT_INTER", "MUNIC_RES", "SEXO")),
+)
+
+
+# Inlinable helper taught by the templates once detect_database_features finds it
+NONEMPTY_FUNCTION = (
+    "CREATE OR REPLACE FUNCTION nonempty(text) RETURNS boolean "
+    "AS $$ SELECT $1 IS NOT NULL AND $1 <> '' $$ "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE"
+)
+
+# Partial indexes for the "non-empty column" filters (name, table, column)
+NONEMPTY_INDEXES: Tuple[Tuple[str, str, str], ...] = (
+    ("idx_obstetricos_insc_pn_nonempty", "obstetricos", "INSC_PN"),
+)
+
+
+# Pre-aggregated "flagship" queries from MULTI_TABLE_RULES (view name, query, unique key columns)
+MATERIALIZED_VIEWS: Tuple[Tuple[str, str, str], ...] = (
+    (
+        "mv_deaths_by_cid",
+        '''SELECT c."CID", c."CD_DESCRICAO", COUNT(*) AS deaths
+        FROM mortes m
+        JOIN cid10 c ON m."CID_MORTE" = c."CID"
+        GROUP BY c."CID", c."CD_DESCRICAO"''',
+        '"CID", "CD_DESCRICAO"',
+    ),
+    (
+        "mv_hospital_mortality",
+        '''SELECT h."NATUREZA",
+               COUNT(DISTINCT i."N_AIH") AS total_admissions,
+               COUNT(DISTINCT m."N_AIH") AS deaths
+        FROM internacoes i
+        LEFT JOIN mortes m ON i."N_AIH" = m."N_AIH"
+        JOIN hospital h ON i."CNES" = h."CNES"
+        WHERE h."NATUREZA" IS NOT NULL
+        GROUP BY h."NATUREZA"''',
+        '"NATUREZA"',
+    ),
+    (
+        "mv_proc_stats",
+        '''SELECT p."PROC_REA", p."NOME_PROC",
+               COUNT(*) AS total_internacoes,
+               SUM(i."VAL_TOT") AS valor_total,
+               COUNT(i."VAL_TOT") AS valor_count
+        FROM internacoes i
+        JOIN procedimentos p ON i."PROC_REA" = p."PROC_REA"
+        GROUP BY p."PROC_REA", p."NOME_PROC"''',
+        '"PROC_REA", "NOME_PROC"',
+    ),
+)
+
+# Optional objects the SQL templates can teach, checked against the live catalog
+# (a feature is only true once its objects exist and are usable)
+DATABASE_FEATURES_SQL = (
+    "SELECT EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'nonempty' "
+    "AND pg_function_is_visible(oid)) AS nonempty, "
+    "(SELECT COUNT(*) FROM pg_matviews WHERE ispopulated AND matviewname IN ("
+    + ", ".join(f"'{name}'" for name, _, _ in MATERIALIZED_VIEWS)
+    + f")) = {len(MATERIALIZED_VIEWS)} AS matviews"
+)
+
+
+def detect_database_features(engine) -> Dict[str, bool]:
+    """
+    Check which bootstrapped objects are available in the database
+    
+    Args:
+        engine: SQLAlchemy engine of the target database
+        
+    Returns:
+        Dictionary mapping feature name -> available (the keyword arguments
+        of table_templates.set_database_features)
+    """
+    with engine.connect() as conn:
+        row = conn.exec_driver_sql(DATABASE_FEATURES_SQL).mappings().one()
+    return {name: bool(value) for name, value in row.items()}
+
+
 class PostgreSQLDatabaseConnectionService(IDatabaseConnectionService):
     """PostgreSQL implementation of database connection service"""
     
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        min_connections: int = 1,
+        max_connections: int = 16,
+        sample_rows_in_table_info: int = 3
+    ):
         """
         Initialize PostgreSQL database connection service
         
         Args:
             db_path: PostgreSQL connection string
+            min_connections: Connections kept open by the raw connection pool
+            max_connections: Upper bound of concurrent raw connections
+            sample_rows_in_table_info: Sample rows LangChain adds to table info (0 skips the queries)
         """
         self._db_path = db_path
+        # Convert sqlalchemy URL to psycopg2 format (once)
+        self._raw_dsn = db_path.replace('postgresql+psycopg2://', 'postgresql://', 1)
+        self._sample_rows_in_table_info = sample_rows_in_table_info
         self._connection: Optional[SQLDatabase] = None
         self._raw_connection = None
+        self._min_connections = min_connections
+        self._max_connections = max_connections
+        self._pool = None
+        self._pool_lock = threading.Lock()
     
     def get_connection(self) -> SQLDatabase:
         """Get LangChain SQLDatabase connection"""
         if self._connection is None:
-            self._connection = SQLDatabase.from_uri(self._db_path)
+            engine = create_engine(self._db_path, pool_pre_ping=True)
+            self._connection = SQLDatabase(
+                engine,
+                sample_rows_in_table_info=self._sample_rows_in_table_info
+            )
         return self._connection
     
+    def _get_pool(self):
+        """Get (lazily creating) the thread-safe raw connection pool"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadedConnectionPool(
+                        self._min_connections,
+                        self._max_connections,
+                        dsn=self._raw_dsn
+                    )
+        return self._pool
+    
+    @contextmanager
+    def borrow(self) -> Iterator:
+        """Borrow a raw PostgreSQL connection from the pool for the duration of the block"""
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            pool.putconn(conn)
+    
     def get_raw_connection(self):
-        """Get raw PostgreSQL connection for direct queries"""
+        """Get raw PostgreSQL connection for direct queries (held until close_connection)"""
         if self._raw_connection is None:
-            try:
-                import psycopg2
-                # Convert sqlalchemy URL to psycopg2 format
-                db_url = self._db_path.replace('postgresql+psycopg2://', 'postgresql://')
-                self._raw_connection = psycopg2.connect(db_url)
-            except ImportError:
-                raise ImportError("psycopg2 não instalado. Execute: pip install psycopg2-binary")
+            self._raw_connection = self._get_pool().getconn()
         return self._raw_connection
     
+    def fetch_arrow(self, sql: str):
+        """
+        Execute a read query and return the result as a columnar pyarrow.Table
+        
+        Rows are decoded straight into Arrow column buffers (connectorx, binary
+        protocol) instead of one Python tuple per row; convert with
+        Table.to_pandas() only where a DataFrame is really needed.
+        
+        Args:
+            sql: Query text
+            
+        Returns:
+            pyarrow.Table with the query result
+        """
+        try:
+            import connectorx
+        except ImportError:
+            raise ImportError("connectorx não instalado. Execute: pip install connectorx pyarrow")
+        return connectorx.read_sql(self._raw_dsn, sql, return_type="arrow")
+    
+    def _run_ddl(self, statements: Sequence[Tuple[str, str]]) -> Dict[str, Optional[str]]:
+        """
+        Run (name, DDL) statements in autocommit mode; one failure doesn't stop the rest
+        
+        Returns:
+            Dictionary mapping name -> None on success, else the error text
+        """
+        results: Dict[str, Optional[str]] = {}
+        with self.borrow() as conn:
+            autocommit = conn.autocommit
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cursor:
+                    for name, statement in statements:
+                        try:
+                            cursor.execute(statement)
+                            results[name] = None
+                        except Exception as e:
+                            results[name] = str(e).strip() or type(e).__name__
+            finally:
+                conn.autocommit = autocommit
+        return results
+    
+    def _invalid_indexes(self, names: Sequence[str]) -> List[str]:
+        """Indexes among names left INVALID by an interrupted CREATE INDEX CONCURRENTLY"""
+        with self.borrow() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                        "WHERE NOT i.indisvalid AND c.relname = ANY(%s) AND pg_table_is_visible(c.oid)",
+                        (list(names),)
+                    )
+                    return [row[0] for row in cursor.fetchall()]
+            finally:
+                conn.rollback()
+    
+    def bootstrap_indexes(self) -> Dict[str, Optional[str]]:
+        """
+        Create the indexes for the documented JOIN columns if they don't exist
+        
+        Meant to run once from the bootstrap command (--indexes), not on every
+        start. Indexes are built CONCURRENTLY so writers aren't blocked; an
+        INVALID leftover from an interrupted build is dropped and rebuilt,
+        since IF NOT EXISTS would otherwise keep it forever.
+        The join-order hints taught in the mortes template reference
+        idx_internacoes_naih and only take effect with the pg_hint_plan
+        extension (CREATE EXTENSION pg_hint_plan, plus shared_preload_libraries
+        or LOAD 'pg_hint_plan'); without it they are plain comments.
+        Also creates the nonempty(text) function and the partial indexes
+        matching it (the templates switch to nonempty() once the function
+        is found in pg_proc), and the composite indexes leading with PROC_REA so
+        per-procedure queries filtered by DT_INTER/MUNIC_RES/SEXO avoid
+        scanning all of internacoes.
+        
+        Returns:
+            Dictionary mapping index/function name -> None when created or
+            already present, else the error text
+        """
+        indexes = [
+            (name, f'{table}("{column}")')
+            for name, table, column in BOOTSTRAP_INDEXES
+        ]
+        indexes.extend(
+            (name, f'{table}(' + ", ".join(f'"{column}"' for column in columns) + ')')
+            for name, table, columns in COMPOSITE_INDEXES
+        )
+        indexes.extend(
+            (name, f'{table}("{column}") WHERE "{column}" IS NOT NULL AND "{column}" <> \'\'')
+            for name, table, column in NONEMPTY_INDEXES
+        )
+        
+        statements = [("nonempty", NONEMPTY_FUNCTION)]
+        statements.extend(
+            (f"{name} (invalid, dropped)", f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            for name in self._invalid_indexes([name for name, _ in indexes])
+        )
+        statements.extend(
+            (name, f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {target}")
+            for name, target in indexes
+        )
+        return self._run_ddl(statements)
+    
+    def bootstrap_materialized_views(self) -> Dict[str, Optional[str]]:
+        """
+        Create the materialized views for the hot multi-table aggregates
+        
+        Meant to run once from the bootstrap command (--matviews). Each view
+        gets a unique index so it can be refreshed concurrently; keep them
+        current with refresh_materialized_views (see the bootstrap command).
+        The SQL templates only teach the views once detect_database_features
+        finds all of them populated.
+        
+        Returns:
+            Dictionary mapping view name -> None when created or already
+            present, else the error text
+        """
+        statements = []
+        for name, query, key_columns in MATERIALIZED_VIEWS:
+            statements.append((name, f"CREATE MATERIALIZED VIEW IF NOT EXISTS {name} AS {query}"))
+            statements.append((
+                f"{name}_key",
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_key ON {name}({key_columns})"
+            ))
+        return self._run_ddl(statements)
+    
+    def refresh_materialized_views(self, concurrently: bool = True) -> Dict[str, Optional[str]]:
+        """
+        Refresh the aggregate materialized views (meant for a nightly job,
+        e.g. cron running the bootstrap command with --refresh-matviews)
+        
+        Args:
+            concurrently: Refresh without blocking readers of the views
+            
+        Returns:
+            Dictionary mapping view name -> None when refreshed, else the error text
+        """
+        mode = "CONCURRENTLY " if concurrently else ""
+        return self._run_ddl([
+            (name, f"REFRESH MATERIALIZED VIEW {mode}{name}")
+            for name, _, _ in MATERIALIZED_VIEWS
+        ])
+    
     def close_connection(self) -> None:
         """Close database connections"""
-        if self._raw_connection:
-            self._raw_connection.close()
-            self._raw_connection = None
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+        self._raw_connection = None
         self._connection = None
     
-    def test_connection(self) -> bool:
-        """Test if database connection is working"""
+    def test_connection(self, deep: bool = False) -> bool:
+        """
+        Test if database connection is working
+        
+        Args:
+            deep: Run a real SELECT 1 (500 ms timeout) instead of only checking
+                the pooled connection state
+            
+        Returns:
+            True if the connection is usable
+        """
         try:
-            import psycopg2
-            db_url = self._db_path.replace('postgresql+psycopg2://', 'postgresql://')
-            conn = psycopg2.connect(db_url)
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1")
-            result = cursor.fetchone()
-            conn.close()
+            with self.borrow() as conn:
+                if not deep:
+                    # Liveness fast path: no round-trip, just the connection state
+                    return conn.closed == 0 and conn.status == _pg_extensions.STATUS_READY
+                with conn.cursor() as cursor:
+                    cursor.execute("SET LOCAL statement_timeout = 500")
+                    cursor.execute("SELECT 1")
+                    result = cursor.fetchone()
+                conn.rollback()
             return result is not None
         except Exception:
             return False
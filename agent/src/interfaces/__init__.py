@@ -5,4 +5,12 @@ This package contains different interfaces to interact with the core business lo
 - api: FastAPI web server interface
 - cli: Command-line interface
 - web: Future web interface (planned)
-"""
\ No newline at end of file
+"""
+
+
+def __getattr__(name):
+    # Lazy so the CLI does not import FastAPI just by importing this package
+    if name == "ORJSONResponse":
+        from .api.responses import ORJSONResponse
+        return ORJSONResponse
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
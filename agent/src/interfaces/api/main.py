@@ -1,94 +1,471 @@
 import sys
 import os
-from typing import Dict, Any, Optional
+import asyncio
+import functools
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from contextlib import asynccontextmanager
 import uvicorn
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+from starlette.routing import Route
+from pydantic import BaseModel, ConfigDict
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Load environment variables once; uvicorn workers inherit them from the parent
+if os.getenv("DOTENV_LOADED") != "1":
+    load_dotenv()
+    os.environ["DOTENV_LOADED"] = "1"
 
-# Add project root to path
-project_root = os.path.join(os.path.dirname(__file__), '..', '..', '..')
-sys.path.append(project_root)
+# Only a direct script run (python src/interfaces/api/main.py) needs the project
+# root on sys.path; imported as src.interfaces.api.main it is already importable
+if not __package__:
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
 
 from src.application.config.simple_config import (
+    ApiConfig,
     ApplicationConfig,
     OrchestratorConfig
 )
 # TXT2SQL Agent Orchestrator
 from src.agent.orchestrator import LangGraphOrchestrator, create_production_orchestrator
+from src.agent.state import state_to_legacy_format
 from src.application.config.simple_config import InterfaceType
+from src.application.config.table_templates import (
+    get_available_templates,
+    get_template_stats,
+    validate_template_coverage,
+)
+from src.interfaces import ORJSONResponse
+from src.interfaces.api.responses import dumps
 from src.utils.logging_config import get_api_logger
 
 # Initialize logger
 logger = get_api_logger()
 
-# Global agent instance - now using LangGraph V3 Orchestrator
-agent: Optional[LangGraphOrchestrator] = None
+# API settings, read from the environment once
+settings = ApiConfig()
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Application lifespan manager"""
-    global agent
-    try:
-        # Startup
-        config = ApplicationConfig()
-        llm_provider = config.llm_provider
-        llm_model = config.llm_model
+# Response timestamp, formatted at most once per second
+_NOW_ISO: Tuple[int, str] = (0, "")
+
+
+def now_iso() -> str:
+    """Current local time in ISO format, at one-second resolution"""
+    global _NOW_ISO
+    second = int(time.time())
+    if second != _NOW_ISO[0]:
+        _NOW_ISO = (second, datetime.fromtimestamp(second).isoformat())
+    return _NOW_ISO[1]
+
+
+# Default model and the landing-page example questions (also used for the startup warm-up)
+DEFAULT_MODEL = "llama3.1:8b"
+EXAMPLE_QUESTIONS: Tuple[str, ...] = (
+    "How many patients are there?",
+    "What is the average age of patients?",
+    "How many deaths occurred?",
+    "Show patients from Porto Alegre",
+)
+
+# Literal tokens of a question for the semantic cache: quoted text, and any
+# token containing a digit (years, counts, CID codes like I21.9, procedure codes)
+_QUOTED_RE = re.compile(r"'([^']*)'|\"([^\"]*)\"")
+_CODE_RE = re.compile(r"\b\w*\d[\w.\-/]*")
+_NAME_PUNCTUATION = ".,;:!?()\"'"
+
+
+
+
+class CachedOrchestrator:
+    """
+    Response cache in front of the orchestrator's process_query
+    
+    Exact tier: LRU keyed by (model, normalized question) with a TTL.
+    Semantic tier (SEMANTIC_CACHE_ENABLED=true): question embeddings from a
+    small SentenceTransformer; a cached response is reused when the cosine
+    similarity to a previous question exceeds SEMANTIC_CACHE_THRESHOLD and
+    both questions carry the same literals (numbers, codes, quoted text,
+    proper names), so "mortes em 2020" never answers "mortes em 2021".
+    Only successful results are cached. Everything else is delegated to
+    the wrapped orchestrator.
+    """
+    
+    def __init__(
+        self,
+        orchestrator: LangGraphOrchestrator,
+        capacity: int = settings.query_cache_size,
+        ttl: float = settings.query_cache_ttl,
+        semantic: bool = settings.semantic_cache_enabled,
+        threshold: float = settings.semantic_cache_threshold
+    ):
+        self._orchestrator = orchestrator
+        self._capacity = capacity
+        self._ttl = ttl
+        self._threshold = threshold
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any], Any, frozenset]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._matrix_keys: List[Tuple[str, str]] = []
+        self._hits = {"exact": 0, "semantic": 0}
+        self._misses = 0
+        self._encoder = self._load_encoder() if semantic else None
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._orchestrator, name)
+    
+    @staticmethod
+    def _load_encoder():
+        """Load the sentence embedding model, or None when it is unavailable"""
+        try:
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(settings.semantic_cache_model)
+        except Exception as e:
+            logger.warning("Semantic cache disabled", extra={
+                "error": str(e),
+                "hint": "pip install sentence-transformers"
+            })
+            return None
+    
+    @staticmethod
+    def _key(question: str, model: str) -> Tuple[str, str]:
+        return model, " ".join(question.lower().split())
+    
+    @staticmethod
+    def _literals(question: str) -> frozenset:
+        """Tokens a semantic match must share exactly (years, counts, CID/procedure codes, names)"""
+        literals = {text.lower() for groups in _QUOTED_RE.findall(question) for text in groups if text}
+        literals.update(token.lower() for token in _CODE_RE.findall(question))
+        # Capitalized words after the first one: municipality/hospital names
+        words = question.split()
+        literals.update(
+            word.strip(_NAME_PUNCTUATION).lower() for word in words[1:]
+            if word[:1].isupper()
+        )
+        return frozenset(literals)
+    
+    def process_query(self, user_query: str, model: str = "", **kwargs) -> Dict[str, Any]:
+        """Process a query, answering from the cache when possible"""
+        cached, vector = self.lookup(user_query, model)
+        if cached is not None:
+            return cached
         
-        logger.info("Initializing LLM", extra={"model": llm_model, "provider": llm_provider})
+        result = self._orchestrator.process_query(user_query=user_query, **kwargs)
+        self.store(user_query, model, result, vector)
+        return {**result, "cache_hit": False}
+    
+    def lookup(self, user_query: str, model: str = "") -> Tuple[Optional[Dict[str, Any]], Any]:
+        """
+        Look a query up in both cache tiers
         
-        agent = initialize_agent()
+        Returns:
+            (cached result or None, question embedding to pass to store())
+        """
+        key = self._key(user_query, model)
+        vector = None
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits["exact"] += 1
+                return {**entry[1], "cache_hit": True}, None
         
-        # Get detailed model information
-        try:
-            model_info = agent.get_current_model()
-            logger.info("TXT2SQL Agent initialized successfully", extra={
-                "provider": model_info.get('provider', 'Unknown'),
-                "model": model_info.get('model_name', 'Unknown'),
-                "version": "LangGraph V3 Official Patterns"
+        if self._encoder is not None:
+            vector = self._encoder.encode(key[1], normalize_embeddings=True)
+            with self._lock:
+                result = self._semantic_lookup(model, vector, self._literals(user_query))
+                if result is not None:
+                    self._hits["semantic"] += 1
+                    return {**result, "cache_hit": True}, vector
+        
+        with self._lock:
+            self._misses += 1
+        return None, vector
+    
+    def store(self, user_query: str, model: str, result: Dict[str, Any], vector: Any = None):
+        """Cache a finished result (only successful results are kept)"""
+        if not result.get("success"):
+            return
+        with self._lock:
+            key = self._key(user_query, model)
+            self._entries[key] = (time.monotonic(), result, vector, self._literals(user_query))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
+            self._matrix = None
+    
+    def _expire(self):
+        """Drop entries older than the TTL (caller holds the lock)"""
+        deadline = time.monotonic() - self._ttl
+        expired = [key for key, (stored_at, *_) in self._entries.items() if stored_at < deadline]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+    
+    def _semantic_lookup(self, model: str, vector, literals: frozenset) -> Optional[Dict[str, Any]]:
+        """Best cached result above the similarity threshold with the same literals (caller holds the lock)"""
+        import numpy as np
+        
+        if self._matrix is None:
+            self._matrix_keys = [key for key, entry in self._entries.items() if entry[2] is not None]
+            self._matrix = (
+                np.vstack([self._entries[key][2] for key in self._matrix_keys])
+                if self._matrix_keys else None
+            )
+        if self._matrix is None:
+            return None
+        
+        similarities = self._matrix @ vector
+        for index in np.argsort(similarities)[::-1]:
+            if similarities[index] <= self._threshold:
+                break
+            key = self._matrix_keys[index]
+            if key[0] == model and self._entries[key][3] == literals:
+                self._entries.move_to_end(key)
+                return self._entries[key][1]
+        return None
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the response cache"""
+        with self._lock:
+            hits = self._hits["exact"] + self._hits["semantic"]
+            total = hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "capacity": self._capacity,
+                "ttl_seconds": self._ttl,
+                "semantic_enabled": self._encoder is not None,
+                "exact_hits": self._hits["exact"],
+                "semantic_hits": self._hits["semantic"],
+                "misses": self._misses,
+                "hit_rate": hits / total if total else 0
+            }
+
+
+# Global agent instance - LangGraph V3 Orchestrator behind the response cache
+agent: Optional[CachedOrchestrator] = None
+
+# Bounded pool for the blocking agent calls, so the event loop keeps serving
+# requests during an LLM turn without oversubscribing the model
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.agent_workers,
+    thread_name_prefix="agent"
+)
+
+
+async def run_agent(func, *args, **kwargs) -> Any:
+    """Run a blocking agent call on the agent thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_EXECUTOR, functools.partial(func, *args, **kwargs))
+
+
+# In-flight /query calls keyed like the response cache; identical concurrent
+# questions await the first call instead of running their own pipeline
+_INFLIGHT: Dict[Tuple[str, str], "asyncio.Future"] = {}
+
+
+async def coalesced_query(question: str, model: str, **kwargs) -> Dict[str, Any]:
+    """Process a query, sharing the result with identical in-flight requests"""
+    key = CachedOrchestrator._key(question, model)
+    future = _INFLIGHT.get(key)
+    if future is None:
+        # No await between the lookup and the insert, so the event loop
+        # guarantees a single leader per key without a lock
+        future = asyncio.ensure_future(
+            run_agent(get_agent().process_query, user_query=question, model=model, **kwargs)
+        )
+        _INFLIGHT[key] = future
+        future.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+    # Shielded so one disconnecting client doesn't cancel the call for the others
+    return await asyncio.shield(future)
+
+def _log_model_info(orchestrator: CachedOrchestrator):
+    """Log the loaded model details"""
+    try:
+        model_info = orchestrator.get_current_model()
+        logger.info("TXT2SQL Agent initialized successfully", extra={
+            "provider": model_info.get('provider', 'Unknown'),
+            "model": model_info.get('model_name', 'Unknown'),
+            "version": "LangGraph V3 Official Patterns"
+        })
+        
+        # Show device info if available
+        if 'device' in model_info:
+            device_info = model_info['device']
+            cuda_available = 'cuda' in str(device_info).lower()
+            logger.info("Device information", extra={
+                "device": device_info,
+                "cuda_enabled": cuda_available
             })
+        
+        # Show quantization info for HuggingFace models
+        if model_info.get('provider') == 'HuggingFace':
+            quantization = "4-bit" if model_info.get('load_in_4bit') else \
+                           "8-bit" if model_info.get('load_in_8bit') else "Full precision"
+            logger.info("Model quantization", extra={"quantization": quantization})
             
-            # Show device info if available
-            if 'device' in model_info:
-                device_info = model_info['device']
-                cuda_available = 'cuda' in str(device_info).lower()
-                logger.info("Device information", extra={
-                    "device": device_info,
-                    "cuda_enabled": cuda_available
-                })
-            
-            # Show quantization info for HuggingFace models
-            if model_info.get('provider') == 'HuggingFace':
-                quantization = "4-bit" if model_info.get('load_in_4bit') else \
-                               "8-bit" if model_info.get('load_in_8bit') else "Full precision"
-                logger.info("Model quantization", extra={"quantization": quantization})
-                
-                logger.info("CUDA availability", extra={"cuda_available": model_info.get('cuda_available', False)})
-            
-            # Log availability status
-            available = model_info.get('available', False)
-            logger.info("Model status", extra={"available": available})
-            
-        except Exception as model_info_error:
-            logger.info("TXT2SQL Agent initialized successfully")
-            logger.warning("Could not retrieve detailed model info", extra={"error": str(model_info_error)})
-            
+            logger.info("CUDA availability", extra={"cuda_available": model_info.get('cuda_available', False)})
+        
+        # Log availability status
+        available = model_info.get('available', False)
+        logger.info("Model status", extra={"available": available})
+        
+    except Exception as model_info_error:
+        logger.info("TXT2SQL Agent initialized successfully")
+        logger.warning("Could not retrieve detailed model info", extra={"error": str(model_info_error)})
+
+
+_AGENT_LOCK = threading.Lock()
+
+# Last failed build as (monotonic time, ISO timestamp, error), cleared on success
+_agent_build_failure: Optional[Tuple[float, str, str]] = None
+
+
+def _build_backoff_error() -> Optional[str]:
+    """Error of the last failed build while its retry backoff lasts (None otherwise)"""
+    failure = _agent_build_failure
+    if failure is None or time.monotonic() - failure[0] >= settings.agent_retry_backoff:
+        return None
+    return f"{failure[2]} (failed at {failure[1]}, retrying after {settings.agent_retry_backoff:g}s)"
+
+
+def get_agent() -> CachedOrchestrator:
+    """
+    Get this worker's orchestrator, building it on first use
+    
+    Idle workers never load the model; the lock keeps concurrent first
+    requests from building it twice. A failed build is recorded for the
+    health probes and only retried after settings.agent_retry_backoff.
+    """
+    global agent, _agent_build_failure
+    if agent is None:
+        with _AGENT_LOCK:
+            if agent is None:
+                backoff_error = _build_backoff_error()
+                if backoff_error is not None:
+                    raise RuntimeError(backoff_error)
+                try:
+                    config = ApplicationConfig()
+                    logger.info("Initializing LLM", extra={"model": config.llm_model, "provider": config.llm_provider})
+                    orchestrator = CachedOrchestrator(initialize_agent())
+                except Exception as e:
+                    _agent_build_failure = (time.monotonic(), now_iso(), str(e))
+                    raise
+                _log_model_info(orchestrator)
+                _agent_build_failure = None
+                agent = orchestrator
+    return agent
+
+
+def _build_failure_info() -> Dict[str, str]:
+    """Probe fields describing the last failed build"""
+    _, failed_at, error = _agent_build_failure
+    return {"agent": "build_failed", "error": error, "failed_at": failed_at}
+
+
+async def require_agent() -> CachedOrchestrator:
+    """Get the orchestrator for a request handler (503 if it can't be built)"""
+    if agent is not None:
+        return agent
+    backoff_error = _build_backoff_error()
+    if backoff_error is not None:
+        raise HTTPException(status_code=503, detail=f"Agent not initialized: {backoff_error}")
+    try:
+        orchestrator = await run_agent(get_agent)
     except Exception as e:
         logger.error("Failed to initialize agent", extra={"error": str(e)})
-        raise
+        raise HTTPException(status_code=503, detail=f"Agent not initialized: {str(e)}")
+    return orchestrator
+
+
+# Health snapshot reused for settings.health_refresh_interval seconds, so
+# frequent probes share one orchestrator health check
+_health_snapshot: Optional[Tuple[float, Dict[str, Any]]] = None
+
+
+async def cached_health() -> Dict[str, Any]:
+    """Orchestrator health, refreshed inline once the snapshot is older than the interval"""
+    global _health_snapshot
+    if _health_snapshot is not None and time.monotonic() - _health_snapshot[0] < settings.health_refresh_interval:
+        return _health_snapshot[1]
+    try:
+        health_status = await run_agent(agent.health_check)
+    except Exception as e:
+        health_status = {"status": "error", "error": str(e)}
+    _health_snapshot = (time.monotonic(), health_status)
+    return health_status
+
+
+_warm_up_task: Optional["asyncio.Task"] = None
+
+
+def _start_warm_up():
+    """Start the warm-up (WARMUP=1, eager startup only) once per worker"""
+    global _warm_up_task
+    if _warm_up_task is None and settings.env != "test" and settings.warmup:
+        _warm_up_task = asyncio.create_task(_warm_up())
+
+
+async def _warm_up():
+    """Run the example questions once so the first clicks hit warm LLM and response caches"""
+    for question in EXAMPLE_QUESTIONS:
+        started = time.perf_counter()
+        try:
+            await coalesced_query(
+                question,
+                DEFAULT_MODEL,
+                run_name=f"api_warmup_{time.time_ns()}",
+                tags=["api", "warmup"],
+                metadata={"source": "warmup", "model": DEFAULT_MODEL}
+            )
+        except Exception as e:
+            logger.warning("Warm-up query failed", extra={"question": question, "error": str(e)})
+            continue
+        logger.info("Warm-up query", extra={
+            "question": question,
+            "execution_time": round(time.perf_counter() - started, 2)
+        })
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan manager"""
+    logger.debug("Middleware chain (outermost first)", extra={
+        "middleware": [middleware.cls.__name__ for middleware in app.user_middleware]
+    })
+    # The orchestrator is built lazily on the first request; EAGER_INIT=1
+    # builds it at startup instead (and fails startup if it can't). The
+    # opt-in warm-up only runs there, never alongside a user's first request
+    if settings.eager_init:
+        try:
+            get_agent()
+        except Exception as e:
+            logger.error("Failed to initialize agent", extra={"error": str(e)})
+            raise
+        
+        _start_warm_up()
     
     yield
     
     # Shutdown
     logger.info("Shutting down TXT2SQL Agent")
+    if _warm_up_task is not None:
+        _warm_up_task.cancel()
+    _EXECUTOR.shutdown(wait=False)
 
 # FastAPI app
 app = FastAPI(
@@ -97,23 +474,39 @@ app = FastAPI(
     version="3.0.0-langgraph",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
+# Middleware, added innermost first (Starlette runs the last added outermost):
+# TrustedHost -> CORS -> compression -> routes. Bad hosts are rejected before
+# any other work and CORS preflights are answered without touching compression
+
+# Compression for large result sets and schema text. With brotli-asgi installed,
+# clients accepting "br" get Brotli and the rest fall back to GZip; otherwise GZip
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, quality=4, minimum_size=1024, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # CORS middleware for web frontend
-allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5173,http://127.0.0.1:3000,http://0.0.0.0:3000").split(",")
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=allowed_origins,
+    allow_origins=list(settings.allowed_origins),
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
 )
 
+app.add_middleware(TrustedHostMiddleware, allowed_hosts=list(settings.allowed_hosts))
+
 # Request/Response models
 class QueryRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
     question: str
-    model: str = "llama3.1:8b"
+    model: str = DEFAULT_MODEL
     session_id: Optional[str] = None
 
 class QueryResponse(BaseModel):
@@ -125,6 +518,14 @@ class QueryResponse(BaseModel):
     execution_time: Optional[float] = None
     error_message: Optional[str] = None
     response: Optional[str] = None  # Conversational response
+    cache_hit: bool = False
+    timestamp: str
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str  # Celery state: PENDING, STARTED, SUCCESS, FAILURE, ...
+    result: Optional[QueryResponse] = None
+    error_message: Optional[str] = None
     timestamp: str
 
 class HealthResponse(BaseModel):
@@ -136,6 +537,43 @@ class SchemaResponse(BaseModel):
     schema_info: str
     timestamp: str
 
+
+def query_response(result: Dict[str, Any]) -> QueryResponse:
+    """Build a QueryResponse from a trusted orchestrator result (no validation)"""
+    return QueryResponse.model_construct(
+        success=result["success"],
+        question=result["question"],
+        sql_query=result.get("sql_query"),
+        results=result.get("results"),
+        row_count=result.get("row_count"),
+        execution_time=result["execution_time"],
+        error_message=result.get("error_message"),
+        timestamp=result["timestamp"],
+        response=result.get("response"),  # LangGraph V3 conversational response
+        cache_hit=result.get("cache_hit", False)
+    )
+
+
+def error_response(question: str, message: str) -> QueryResponse:
+    """Build a failed QueryResponse (no validation)"""
+    return QueryResponse.model_construct(
+        success=False,
+        question=question,
+        error_message=message,
+        timestamp=now_iso()
+    )
+
+
+def model_response(model: BaseModel) -> ORJSONResponse:
+    """
+    Render a response model directly
+    
+    Returning a Response skips FastAPI's validation of the value against
+    response_model (which is still used for the OpenAPI docs); models are
+    either validated when built or model_construct-ed from trusted data.
+    """
+    return ORJSONResponse(model.model_dump())
+
 def initialize_agent(model_name: str = None) -> LangGraphOrchestrator:
     """Initialize the LangGraph V3 orchestrator"""
     # Get PostgreSQL configuration
@@ -158,10 +596,25 @@ def initialize_agent(model_name: str = None) -> LangGraphOrchestrator:
     return orchestrator
 
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    """Simple HTML interface"""
-    return """
+# Landing page script, versioned by content hash so it can be cached as immutable
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+with open(os.path.join(STATIC_DIR, "app.js"), "rb") as _app_js:
+    _APP_JS_VERSION = hashlib.sha1(_app_js.read()).hexdigest()[:12]
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Static files with far-future caching (URLs carry a content hash)"""
+    
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+app.mount("/static", ImmutableStaticFiles(directory=STATIC_DIR), name="static")
+
+# Static landing page, built once: served with an ETag so browsers revalidate with a 304
+ROOT_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -192,172 +645,307 @@ async def root():
             
             <h3>Example Questions:</h3>
             <ul>
-                <li><a href="#" onclick="askExample('How many patients are there?')">How many patients are there?</a></li>
-                <li><a href="#" onclick="askExample('What is the average age of patients?')">What is the average age of patients?</a></li>
-                <li><a href="#" onclick="askExample('How many deaths occurred?')">How many deaths occurred?</a></li>
-                <li><a href="#" onclick="askExample('Show patients from Porto Alegre')">Show patients from Porto Alegre</a></li>
+{example_questions}
             </ul>
             
             <h3>API Documentation:</h3>
             <p><a href="/docs" target="_blank">Swagger UI</a> | <a href="/redoc" target="_blank">ReDoc</a></p>
         </div>
         
-        <script>
-            async function queryAPI() {
-                const question = document.getElementById('question').value;
-                if (!question.trim()) return;
-                
-                const resultDiv = document.getElementById('result');
-                resultDiv.innerHTML = '<div class="result">Processing...</div>';
-                
-                try {
-                    const response = await fetch('/query', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({ question: question })
-                    });
-                    
-                    const data = await response.json();
-                    
-                    if (data.success) {
-                        resultDiv.innerHTML = `
-                            <div class="result success">
-                                <h4> Success</h4>
-                                <p><strong>Question:</strong> ${data.question}</p>
-                                <p><strong>Result:</strong> ${JSON.stringify(data.results)}</p>
-                                <p><strong>Rows:</strong> ${data.row_count}</p>
-                                <p><strong>Time:</strong> ${data.execution_time?.toFixed(2)}s</p>
-                                <details>
-                                    <summary>SQL Query</summary>
-                                    <pre>${data.sql_query}</pre>
-                                </details>
-                            </div>
-                        `;
-                    } else {
-                        resultDiv.innerHTML = `
-                            <div class="result error">
-                                <h4> Error</h4>
-                                <p><strong>Question:</strong> ${data.question}</p>
-                                <p><strong>Error:</strong> ${data.error_message}</p>
-                            </div>
-                        `;
-                    }
-                } catch (error) {
-                    resultDiv.innerHTML = `<div class="result error">Network error: ${error.message}</div>`;
-                }
-            }
-            
-            async function getSchema() {
-                const resultDiv = document.getElementById('result');
-                resultDiv.innerHTML = '<div class="result">Loading schema...</div>';
-                
-                try {
-                    const response = await fetch('/schema');
-                    const data = await response.json();
-                    
-                    resultDiv.innerHTML = `
-                        <div class="result">
-                            <h4> Database Schema</h4>
-                            <pre>${data.schema_info}</pre>
-                        </div>
-                    `;
-                } catch (error) {
-                    resultDiv.innerHTML = `<div class="result error">Error loading schema: ${error.message}</div>`;
-                }
-            }
-            
-            function askExample(question) {
-                document.getElementById('question').value = question;
-                queryAPI();
-            }
-            
-            // Enter key support
-            document.getElementById('question').addEventListener('keypress', function(e) {
-                if (e.key === 'Enter') queryAPI();
-            });
-        </script>
+        <script src="/static/app.js?v={app_js_version}"></script>
     </body>
     </html>
-    """
+    """.replace("{app_js_version}", _APP_JS_VERSION).replace("{example_questions}", "\n".join(
+    f"""                <li><a href="#" onclick="askExample('{question}')">{question}</a></li>"""
+    for question in EXAMPLE_QUESTIONS
+))
+
+ROOT_HTML_BYTES = ROOT_HTML.encode("utf-8")
+_ROOT_ETAG = f'"{hashlib.md5(ROOT_HTML_BYTES).hexdigest()}"'
+
+
+@app.get("/", response_class=HTMLResponse)
+async def root(request: Request):
+    """Simple HTML interface"""
+    if request.headers.get("if-none-match") == _ROOT_ETAG:
+        return Response(status_code=304, headers={"ETag": _ROOT_ETAG})
+    # A new response per request: the compression middleware edits its headers in place
+    return HTMLResponse(
+        content=ROOT_HTML_BYTES,
+        headers={"Cache-Control": "public, max-age=86400", "ETag": _ROOT_ETAG}
+    )
 
 @app.post("/query", response_model=QueryResponse)
 async def query_database(request: QueryRequest):
     """Process natural language query"""
-    if not agent:
-        raise HTTPException(status_code=500, detail="Agent not initialized")
+    await require_agent()
     
     if not request.question or not request.question.strip():
         raise HTTPException(status_code=400, detail="Question cannot be empty")
     
     try:
         # Use LangGraph V3 orchestrator with LangSmith tracing
-        result = agent.process_query(
-            user_query=request.question,
+        result = await coalesced_query(
+            request.question,
+            request.model,
             session_id=request.session_id,
-            run_name=f"api_query_{int(datetime.now().timestamp())}",
+            run_name=f"api_query_{time.time_ns()}",
             tags=["api", "production", "txt2sql_api_server"],
             metadata={"source": "api_server", "model": request.model}
         )
         
-        return QueryResponse(
-            success=result["success"],
-            question=result["question"],
-            sql_query=result.get("sql_query"),
-            results=result.get("results"),
-            row_count=result.get("row_count"),
-            execution_time=result["execution_time"],
-            error_message=result.get("error_message"),
-            timestamp=result["timestamp"],
-            response=result.get("response")  # LangGraph V3 conversational response
-        )
+        return model_response(query_response(result))
     except Exception as e:
-        return QueryResponse(
-            success=False,
-            question=request.question,
-            error_message=f"Internal server error: {str(e)}",
-            timestamp=datetime.now().isoformat()
-        )
+        return model_response(error_response(request.question, f"Internal server error: {str(e)}"))
+
+def _sse(event: str, payload: Dict[str, Any]) -> bytes:
+    """Format one Server-Sent Event"""
+    return b"event: " + event.encode() + b"\ndata: " + dumps(payload) + b"\n\n"
+
+
+def _row_events(rows: Any):
+    """Rows events for a result set, in batches of settings.stream_batch_size"""
+    if not isinstance(rows, list):
+        yield _sse("rows", {"batch": [rows]})
+        return
+    for start in range(0, len(rows), settings.stream_batch_size):
+        yield _sse("rows", {"batch": rows[start:start + settings.stream_batch_size]})
+
+
+def _done_event(result: Dict[str, Any]) -> bytes:
+    """Final event with the fields not already streamed"""
+    return _sse("done", {
+        "success": result["success"],
+        "question": result["question"],
+        "row_count": result.get("row_count"),
+        "execution_time": result.get("execution_time"),
+        "error_message": result.get("error_message"),
+        "response": result.get("response"),
+        "cache_hit": result.get("cache_hit", False),
+        "timestamp": result.get("timestamp", now_iso())
+    })
+
+
+@app.get("/query/stream")
+async def stream_query(question: str, model: str = DEFAULT_MODEL, session_id: Optional[str] = None):
+    """
+    Process a natural language query as a Server-Sent Events stream
+    
+    Events: "started" right away, "sql_generated" as soon as the SQL is
+    generated (again if it is repaired), "rows" with batches of
+    settings.stream_batch_size rows once the query ran, then "done" with the
+    remaining fields. Cache hits and identical in-flight queries are replayed
+    from their finished result.
+    """
+    agent = await require_agent()
+    
+    if not question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    
+    async def events():
+        yield _sse("started", {"question": question, "timestamp": now_iso()})
+        started = time.perf_counter()
+        try:
+            result, vector = await run_agent(agent.lookup, question, model)
+            inflight = _INFLIGHT.get(CachedOrchestrator._key(question, model))
+            if result is None and inflight is not None:
+                result = await asyncio.shield(inflight)
+            if result is not None:
+                if result.get("sql_query"):
+                    yield _sse("sql_generated", {"sql": result["sql_query"]})
+                for event in _row_events(result.get("results") or []):
+                    yield event
+                yield _done_event(result)
+                return
+            
+            state = None
+            sql = None
+            async for update in agent.astream_query(
+                user_query=question,
+                session_id=session_id,
+                run_name=f"api_stream_{time.time_ns()}",
+                tags=["api", "production", "txt2sql_api_server", "stream"],
+                metadata={"source": "api_server", "model": model}
+            ):
+                if update.get("success") is False and "error" in update:
+                    raise RuntimeError(update["error"])
+                for node, node_state in update.items():
+                    if not isinstance(node_state, dict):
+                        continue
+                    state = node_state
+                    if node in ("generate_sql", "repair_sql"):
+                        generated = node_state.get("generated_sql")
+                        if generated and generated != sql:
+                            sql = generated
+                            yield _sse("sql_generated", {"sql": sql})
+                    elif node == "execute_sql":
+                        execution = node_state.get("sql_execution_result")
+                        if execution is not None and execution.success:
+                            for event in _row_events(execution.results or []):
+                                yield event
+            
+            if state is None:
+                raise RuntimeError("Workflow produced no state")
+            result = state_to_legacy_format(state)
+            result["execution_time"] = time.perf_counter() - started
+            agent.store(question, model, result, vector)
+        except Exception as e:
+            yield _sse("done", {
+                "success": False,
+                "question": question,
+                "error_message": f"Internal server error: {str(e)}",
+                "timestamp": now_iso()
+            })
+            return
+        
+        yield _done_event({**result, "cache_hit": False})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _job_queue():
+    """Celery task module, or None when REDIS_URL is not configured"""
+    if not settings.redis_url:
+        return None
+    from src.interfaces.api import tasks
+    return tasks
+
+
+@app.post("/query/jobs", response_model=JobResponse)
+async def submit_query_job(request: QueryRequest):
+    """Queue a natural language query; poll GET /query/jobs/{job_id} for the result"""
+    tasks = _job_queue()
+    if tasks is None:
+        raise HTTPException(status_code=503, detail="Job queue not configured (set REDIS_URL)")
+    
+    if not request.question or not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    
+    job = await asyncio.to_thread(
+        tasks.run_query.delay, request.question, request.model, request.session_id
+    )
+    return JobResponse(job_id=job.id, status="PENDING", timestamp=now_iso())
+
+@app.get("/query/jobs/{job_id}", response_model=JobResponse)
+async def get_query_job(job_id: str):
+    """Get the status and, once finished, the result of a queued query"""
+    tasks = _job_queue()
+    if tasks is None:
+        raise HTTPException(status_code=503, detail="Job queue not configured (set REDIS_URL)")
+    
+    job = tasks.celery_app.AsyncResult(job_id)
+    status = await asyncio.to_thread(lambda: job.state)
+    response = JobResponse(job_id=job_id, status=status, timestamp=now_iso())
+    
+    if status == "SUCCESS":
+        result = await asyncio.to_thread(lambda: job.result)
+        response.result = query_response(result)
+    elif status == "FAILURE":
+        response.error_message = str(job.result)
+    return model_response(response)
+
+class _LivenessProbe:
+    """
+    Liveness probe as a bare ASGI app: the process is serving requests
+    
+    Sends a pre-encoded body without request parsing, dependency injection,
+    Pydantic or JSON encoding; no dependencies are checked.
+    """
+    BODY = b'{"status":"ok"}'
+    CONTENT_LENGTH = str(len(BODY)).encode()
+    
+    async def __call__(self, scope, receive, send):
+        # Fresh messages per request: middlewares (CORS) mutate the header list
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", self.CONTENT_LENGTH),
+            ],
+        })
+        await send({"type": "http.response.body", "body": self.BODY})
+
+
+# First in the route table, so probes don't scan the other routes
+app.router.routes.insert(0, Route("/health/live", endpoint=_LivenessProbe(), methods=["GET"], include_in_schema=False))
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe from the cached health snapshot (503 when not healthy)"""
+    if not agent:
+        if _agent_build_failure is not None:
+            return ORJSONResponse({"status": "not_ready", **_build_failure_info()}, status_code=503)
+        return {"status": "ready", "agent": "not_loaded"}
+    health_status = await cached_health()
+    if health_status.get("status") != "healthy":
+        return ORJSONResponse({"status": "not_ready", "health": health_status.get("status")}, status_code=503)
+    return {"status": "ready"}
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
     try:
         if not agent:
-            return HealthResponse(
-                status="unhealthy",
-                timestamp=datetime.now().isoformat(),
-                services={"agent": "not_initialized"}
-            )
+            if _agent_build_failure is not None:
+                return model_response(HealthResponse.model_construct(
+                    status="unhealthy",
+                    timestamp=now_iso(),
+                    services=_build_failure_info()
+                ))
+            # Built lazily on the first query; not loaded yet is not a failure
+            return model_response(HealthResponse.model_construct(
+                status="healthy",
+                timestamp=now_iso(),
+                services={"agent": "not_loaded"}
+            ))
         
-        health_status = agent.health_check()
-        return HealthResponse(
+        health_status = await cached_health()
+        return model_response(HealthResponse.model_construct(
             status=health_status["status"],
-            timestamp=datetime.now().isoformat(),
+            timestamp=now_iso(),
             services={
                 "orchestrator": health_status.get("orchestrator", {}),
                 "langgraph_v3": True,
                 "version": "3.0"
             }
-        )
+        ))
     except Exception as e:
-        return HealthResponse(
+        return model_response(HealthResponse.model_construct(
             status="error",
-            timestamp=datetime.now().isoformat(),
+            timestamp=now_iso(),
             services={"error": str(e)}
-        )
+        ))
+
+# Fixed Portuguese prompts for the schema endpoints, rendered with format_map
+SCHEMA_TABLE_PROMPT = "Descreva a estrutura da tabela {table}"
+SCHEMA_PROMPT = "Mostre a estrutura das tabelas do banco de dados"
+TABLES_PROMPT = "Quais tabelas estão disponíveis?"
+
+
+def prompt_for(template: str, **values) -> Tuple[str, Dict[str, Any]]:
+    """Render a schema prompt plus trace metadata naming its template"""
+    prompt = template.format_map(values)
+    metadata = {
+        "source": "api_server",
+        "prompt_template": template
+    }
+    return prompt, metadata
 
 @app.get("/schema", response_model=SchemaResponse)
 async def get_schema(table: Optional[str] = None):
     """Get database schema information"""
-    if not agent:
-        raise HTTPException(status_code=503, detail="Agent not initialized")
+    agent = await require_agent()
     
     try:
         # Use LangGraph V3 for schema information
         if table:
             # Process table-specific schema request
-            schema_query = f"Descreva a estrutura da tabela {table}"
-            result = agent.process_query(schema_query)
+            schema_query, metadata = prompt_for(SCHEMA_TABLE_PROMPT, table=table)
+            result = await run_agent(agent.process_query, schema_query, metadata=metadata)
             
             if result["success"]:
                 schema_text = result.get("response", f"Informações da tabela {table}")
@@ -366,69 +954,103 @@ async def get_schema(table: Optional[str] = None):
             
         else:
             # Get full schema using LangGraph V3 orchestrator
-            schema_query = "Mostre a estrutura das tabelas do banco de dados"
-            result = agent.process_query(schema_query)
+            schema_query, metadata = prompt_for(SCHEMA_PROMPT)
+            result = await run_agent(agent.process_query, schema_query, metadata=metadata)
             
             if result["success"]:
                 schema_text = result.get("response", "Estrutura das tabelas disponível")
             else:
                 schema_text = f"Erro ao obter schema: {result.get('error_message', 'Erro desconhecido')}"
         
-        return SchemaResponse(
+        return model_response(SchemaResponse.model_construct(
             schema_info=schema_text,
-            timestamp=datetime.now().isoformat()
-        )
+            timestamp=now_iso()
+        ))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Schema error: {str(e)}")
 
+# Current PostgreSQL tables (based on actual schema)
+MAIN_TABLES: Tuple[str, ...] = (
+    'internacoes', 'mortes', 'procedimentos', 'municipios', 'hospital',
+    'cbor', 'cid10', 'diagnosticos_secundarios', 'dado_ibge', 'condicoes_especificas',
+    'infehosp', 'instrucao', 'obstetricos', 'uti_detalhes', 'vincprev'
+)
+
+TABLES_INFO_TTL = 300  # seconds
+_tables_info: Tuple[float, str] = (0.0, "")
+
+
+async def _tables_info_text(agent: CachedOrchestrator) -> str:
+    """Agent's description of the available tables, refreshed every TABLES_INFO_TTL seconds"""
+    global _tables_info
+    fetched_at, text = _tables_info
+    if text and time.monotonic() - fetched_at < TABLES_INFO_TTL:
+        return text
+    
+    tables_query, metadata = prompt_for(TABLES_PROMPT)
+    result = await run_agent(agent.process_query, tables_query, metadata=metadata)
+    text = result.get("response") or "Informações das tabelas"
+    if result["success"]:
+        _tables_info = (time.monotonic(), text)
+    return text
+
 @app.get("/schema/tables")
 async def get_available_tables():
     """Get list of available tables"""
-    if not agent:
-        raise HTTPException(status_code=503, detail="Agent not initialized")
+    agent = await require_agent()
     
     try:
-        # Use LangGraph V3 to get available tables
-        tables_query = "Quais tabelas estão disponíveis?"
-        result = agent.process_query(tables_query)
-        
-        if result["success"]:
-            # Current PostgreSQL tables (based on actual schema)
-            main_tables = ['internacoes', 'mortes', 'procedimentos', 'municipios', 'hospital', 
-                          'cbor', 'cid10', 'diagnosticos_secundarios', 'dado_ibge', 'condicoes_especificas',
-                          'infehosp', 'instrucao', 'obstetricos', 'uti_detalhes', 'vincprev']
-        else:
-            main_tables = []
-        
-        return {
-            "tables": main_tables,
-            "timestamp": datetime.now().isoformat(),
-            "schema_info": result.get("response", "Informações das tabelas")
-        }
+        return ORJSONResponse(
+            {
+                "tables": MAIN_TABLES,
+                "templates": get_available_templates(),
+                "timestamp": now_iso(),
+                "schema_info": await _tables_info_text(agent)
+            },
+            headers={"Cache-Control": f"public, max-age={TABLES_INFO_TTL}"}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Tables error: {str(e)}")
 
+@app.get("/schema/templates")
+async def get_template_metadata(tables: Optional[str] = None):
+    """Get table template statistics and coverage (comma-separated tables)"""
+    requested = [t.strip() for t in tables.split(",") if t.strip()] if tables else list(get_available_templates())
+    return {
+        "stats": get_template_stats(),
+        "coverage": validate_template_coverage(requested),
+        "timestamp": now_iso()
+    }
+
 @app.get("/agent-health")
 async def agent_health_check():
     """Agent health check endpoint"""
     try:
         if not agent:
+            if _agent_build_failure is not None:
+                return {
+                    "agent_status": "offline",
+                    "agent_loaded": False,
+                    "timestamp": now_iso(),
+                    **_build_failure_info()
+                }
             return {
-                "agent_status": "offline",
-                "timestamp": datetime.now().isoformat()
+                "agent_status": "online",
+                "agent_loaded": False,
+                "timestamp": now_iso()
             }
         
-        health_status = agent.health_check()
+        health_status = await cached_health()
         return {
             "agent_status": "online" if health_status["status"] == "healthy" else "offline",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
             "orchestrator": health_status.get("orchestrator", {}),
             "llm_manager": health_status.get("llm_manager", {})
         }
     except Exception as e:
         return {
             "agent_status": "offline",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
             "error": str(e)
         }
 
@@ -439,7 +1061,7 @@ async def get_available_models():
         "models": ["llama3.1:8b", "mistral", "llama3"],
         "default": "llama3.1:8b",
         "current": agent.get_current_model() if agent else None,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso()
     }
 
 @app.get("/migration-stats")
@@ -450,7 +1072,7 @@ async def get_migration_statistics():
             return {
                 "migration_status": "agent_not_initialized",
                 "langgraph_enabled": False,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso()
             }
         
         # Get migration statistics from the orchestrator
@@ -493,13 +1115,14 @@ async def get_migration_statistics():
                 "Comprehensive performance monitoring"
             ],
             "performance_metrics": migration_stats,
-            "timestamp": datetime.now().isoformat()
+            "response_cache": agent.cache_stats(),
+            "timestamp": now_iso()
         }
     except Exception as e:
         return {
             "migration_status": "error",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }
 
 if __name__ == "__main__":
@@ -510,8 +1133,8 @@ if __name__ == "__main__":
         "requirements": "Ollama with llama3 or mistral model"
     })
     
-    host = os.getenv("HOST", "0.0.0.0")
-    port = int(os.getenv("PORT", "8000"))
+    host = settings.host
+    port = settings.port
     
     logger.info("API endpoints configured", extra={
         "api_url": f"http://{host}:{port}",
@@ -519,10 +1142,20 @@ if __name__ == "__main__":
         "stats_url": f"http://{host}:{port}/migration-stats"
     })
     
+    # Reload mode (ENV=dev) watches the filesystem and forces a single worker;
+    # "auto" picks uvloop/httptools when installed (see requirements.txt)
+    reload = settings.env == "dev"
+    workers = 1 if reload else settings.workers
+    
     uvicorn.run(
         "src.interfaces.api.main:app",
         host=host,
         port=port,
-        reload=True,
+        reload=reload,
+        workers=workers,
+        loop=settings.uvicorn_loop,
+        http=settings.uvicorn_http,
+        timeout_keep_alive=30,
+        limit_concurrency=settings.limit_concurrency,
         log_level="info"
     )
@@ -0,0 +1,52 @@
+"""
+Response classes for the TXT2SQL API
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: pip install orjson
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Encode the non-JSON types that show up in SQL result rows"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).decode("utf-8", errors="replace")
+    if hasattr(value, "tolist"):  # numpy arrays/scalars on the stdlib path
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content as compact UTF-8 JSON (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        content, ensure_ascii=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+class ORJSONResponse(Response):
+    """
+    JSON response rendered with orjson when available
+
+    Falls back to the stdlib encoder (without ASCII escaping, so the
+    Portuguese table keywords stay readable) when orjson is not installed.
+    Decimal, date and numpy values from SQL results are encoded as well.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,86 @@
+// Landing page script for the TXT2SQL API (served from /static, cached by content hash)
+
+function queryAPI() {
+    const question = document.getElementById('question').value;
+    if (!question.trim()) return;
+
+    const resultDiv = document.getElementById('result');
+    resultDiv.innerHTML = '<div class="result">Processing...</div>';
+
+    // Stage events from /query/stream; rows arrive in batches
+    const rows = [];
+    let sqlQuery = '';
+    const source = new EventSource('/query/stream?question=' + encodeURIComponent(question));
+
+    source.addEventListener('sql_generated', (event) => {
+        sqlQuery = JSON.parse(event.data).sql || '';
+        resultDiv.innerHTML = '<div class="result">SQL generated, loading rows...</div>';
+    });
+
+    source.addEventListener('rows', (event) => {
+        rows.push(...JSON.parse(event.data).batch);
+    });
+
+    source.addEventListener('done', (event) => {
+        source.close();
+        const data = JSON.parse(event.data);
+
+        if (data.success) {
+            resultDiv.innerHTML = `
+                <div class="result success">
+                    <h4> Success</h4>
+                    <p><strong>Question:</strong> ${data.question}</p>
+                    <p><strong>Result:</strong> ${JSON.stringify(rows)}</p>
+                    <p><strong>Rows:</strong> ${data.row_count}</p>
+                    <p><strong>Time:</strong> ${data.execution_time?.toFixed(2)}s</p>
+                    <details>
+                        <summary>SQL Query</summary>
+                        <pre>${sqlQuery}</pre>
+                    </details>
+                </div>
+            `;
+        } else {
+            resultDiv.innerHTML = `
+                <div class="result error">
+                    <h4> Error</h4>
+                    <p><strong>Question:</strong> ${data.question}</p>
+                    <p><strong>Error:</strong> ${data.error_message}</p>
+                </div>
+            `;
+        }
+    });
+
+    source.onerror = () => {
+        source.close();
+        resultDiv.innerHTML = '<div class="result error">Network error: stream interrupted</div>';
+    };
+}
+
+async function getSchema() {
+    const resultDiv = document.getElementById('result');
+    resultDiv.innerHTML = '<div class="result">Loading schema...</div>';
+
+    try {
+        const response = await fetch('/schema');
+        const data = await response.json();
+
+        resultDiv.innerHTML = `
+            <div class="result">
+                <h4> Database Schema</h4>
+                <pre>${data.schema_info}</pre>
+            </div>
+        `;
+    } catch (error) {
+        resultDiv.innerHTML = `<div class="result error">Error loading schema: ${error.message}</div>`;
+    }
+}
+
+function askExample(question) {
+    document.getElementById('question').value = question;
+    queryAPI();
+}
+
+// Enter key support
+document.getElementById('question').addEventListener('keypress', function(e) {
+    if (e.key === 'Enter') queryAPI();
+});
@@ -0,0 +1,47 @@
+"""
+Celery tasks for the TXT2SQL API - runs /query jobs on dedicated workers
+
+Enabled when REDIS_URL is set. Start a worker from the agent directory with:
+    celery -A src.interfaces.api.tasks worker --concurrency=1
+"""
+from typing import Any, Dict, Optional
+
+try:
+    from celery import Celery
+except ImportError:
+    raise ImportError("celery não instalado. Execute: pip install celery[redis]")
+
+from src.application.config.simple_config import ApiConfig
+
+settings = ApiConfig()
+REDIS_URL = settings.redis_url or "redis://localhost:6379/0"
+
+celery_app = Celery("txt2sql", broker=REDIS_URL, backend=REDIS_URL)
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    # One job at a time per worker process: an LLM turn is long and GPU-bound
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_time_limit=settings.query_task_time_limit,
+    result_expires=settings.query_result_ttl,
+)
+
+def _get_agent():
+    """Orchestrator of this worker process, built on the first job"""
+    from src.interfaces.api.main import get_agent
+    return get_agent()
+
+
+@celery_app.task(name="txt2sql.run_query")
+def run_query(question: str, model: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+    """Run one natural language query through the orchestrator"""
+    return _get_agent().process_query(
+        user_query=question,
+        model=model,
+        session_id=session_id,
+        run_name=f"api_job_{run_query.request.id}",
+        tags=["api", "production", "txt2sql_api_worker"],
+        metadata={"source": "api_worker", "model": model}
+    )
@@ -2,6 +2,10 @@ import re
 from typing import Tuple
 
 
+# pg_hint_plan planner hint, only honored as the leading comment of a statement
+_LEADING_HINT_RE = re.compile(r"^\s*(/\*\+.*?\*/)", re.S)
+
+
 def _strip_sql_comments(sql: str) -> str:
     """Remove SQL comments (/* ... */ and -- ... EOL)."""
     if not sql:
@@ -61,14 +65,17 @@ def is_select_only(sql: str) -> Tuple[bool, str]:
 def sanitize_sql_for_execution(sql: str) -> str:
     """
     Produce a "clean" SQL string safe for validation/execution:
-    - Remove comments (/* ... */ and -- ... EOL)
+    - Remove comments (/* ... */ and -- ... EOL), except a leading /*+ ... */ planner hint
     - Trim surrounding whitespace
     - Collapse excessive internal whitespace and line breaks
     - Keep, at most, a single trailing semicolon
     """
     if not sql:
         return ""
+    hint_match = _LEADING_HINT_RE.match(sql)
     cleaned = _strip_sql_comments(sql).strip()
+    if hint_match:
+        cleaned = f"{hint_match.group(1)} {cleaned}"
     # Collapse whitespace/newlines to single spaces
     collapsed = " ".join(cleaned.split())
     # Normalize trailing semicolon: allow at most one